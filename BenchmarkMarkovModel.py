@@ -0,0 +1,279 @@
+""" benchmarks of the simulation hot path
+
+usage: python BenchmarkMarkovModel.py [--pop-sizes 1000 10000 ...] [--output results.json]
+
+results are written as JSON so that they can be compared between releases """
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from statistics import NormalDist, median
+
+import numpy as np
+
+import InputData as D
+import MarkovClasses as Cls
+import MarkovTraceClasses as Trace
+import ParameterClasses as P
+
+POP_SIZES = [1000, 10000, 100000, 1000000]
+MAX_POP_SIZE_PATIENT_ENGINE = 100000  # the per-patient engine is skipped for larger cohorts
+N_REPEATS = 3
+N_MONITOR_UPDATES = 100000
+EQUIVALENCE_POP_SIZE = 20000
+EQUIVALENCE_ALPHA = 0.001   # significance level of the test of equal means
+
+# modules of the simulation core (they should import with only NumPy)
+CORE_MODULES = ('InputData', 'ParameterClasses', 'OnlineStatClasses', 'MarkovClasses', 'MarkovTraceClasses')
+# packages that should not be imported by the simulation core (they are loaded when outcomes are reported)
+HEAVY_PACKAGES = ('deampy', 'matplotlib', 'scipy', 'statsmodels', 'pandas')
+IMPORT_TIME_BUDGET = 0.5    # largest acceptable time to start Python and import the simulation core (seconds)
+
+
+def measure(func, n_repeats=N_REPEATS):
+    """ runs func n_repeats times
+    :returns (dictionary) minimum and median wall time (seconds) and the peak traced memory (bytes) """
+
+    times = []
+    for i in range(n_repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # memory is measured on a separate run since tracing slows down the code
+    tracemalloc.start()
+    func()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'min_time': min(times), 'median_time': median(times), 'peak_memory': peak_memory}
+
+
+def bench_import_time(n_repeats):
+    """ time to start a new Python process and import the simulation core
+    (the startup cost paid by every worker process and short run) and the heavy packages it imports """
+
+    script = ('import sys, time; start = time.perf_counter(); import {}; '
+              'print(time.perf_counter() - start); print(" ".join(sorted(sys.modules)))') \
+        .format(', '.join(CORE_MODULES))
+
+    times = []
+    import_times = []
+    for i in range(n_repeats):
+        start = time.perf_counter()
+        # (run in the directory of the model so that its modules are found from any working directory)
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        times.append(time.perf_counter() - start)
+        import_time, modules = output.splitlines()
+        import_times.append(float(import_time))
+
+    heavy_packages = sorted({name.split('.')[0] for name in modules.split()} & set(HEAVY_PACKAGES))
+    return {'name': 'import', 'min_time': min(times), 'median_time': median(times),
+            'min_import_time': min(import_times), 'budget': IMPORT_TIME_BUDGET,
+            'heavy_packages': heavy_packages,
+            'passed': min(times) <= IMPORT_TIME_BUDGET and len(heavy_packages) == 0}
+
+
+def bench_cohort_simulate(pop_sizes, n_repeats):
+    """ patients simulated per second by each engine """
+
+    results = []
+    params = P.get_parameters(therapy=P.Therapies.NONE)
+    for engine in Cls.Engines:
+        for pop_size in pop_sizes:
+            if engine == Cls.Engines.PATIENT and pop_size > MAX_POP_SIZE_PATIENT_ENGINE:
+                continue
+
+            def simulate():
+                Cls.Cohort(id=0, pop_size=pop_size, parameters=params).simulate(
+                    n_time_steps=D.SIM_TIME_STEPS, engine=engine)
+
+            result = measure(simulate, n_repeats=n_repeats)
+            result.update({'name': 'Cohort.simulate', 'engine': engine.name, 'pop_size': pop_size,
+                           'patients_per_second': pop_size / result['min_time']})
+            results.append(result)
+    return results
+
+
+def bench_patient_simulate(n_repeats):
+    """ time to create and simulate one patient """
+
+    params = P.get_parameters(therapy=P.Therapies.NONE)
+    sampler = Cls.MarkovSampler(parameters=params)
+    outcomes = Cls.CohortOutcomes(pop_size=1)
+    n_patients = 1000
+
+    def simulate():
+        for i in range(n_patients):
+            Cls.Patient(id=i, parameters=params, outcomes=outcomes, sampler=sampler).simulate(
+                n_time_steps=D.SIM_TIME_STEPS)
+
+    result = measure(simulate, n_repeats=n_repeats)
+    result.update({'name': 'Patient.simulate', 'time_per_call': result['min_time'] / n_patients})
+    return [result]
+
+
+def bench_monitor_update(n_repeats):
+    """ time of one call to the cost-utility and state monitors
+    (with health states given by their indices, as in the simulation loops) """
+
+    params = P.get_parameters(therapy=P.Therapies.NONE)
+    outcomes = Cls.CohortOutcomes(pop_size=1)
+    cost_monitor = Cls.PatientCostUtilityMonitor(parameters=params, outcomes=outcomes, index=0)
+
+    def update_cost_monitor():
+        for i in range(N_MONITOR_UPDATES):
+            cost_monitor.update_index(t=i % D.SIM_TIME_STEPS,
+                                      current_state_index=D.HealthStates.WELL.value,
+                                      next_state_index=D.HealthStates.STROKE.value)
+
+    def update_state_monitor():
+        for i in range(N_MONITOR_UPDATES):
+            # a new monitor every 50 updates since the monitor stops updating after death
+            if i % D.SIM_TIME_STEPS == 0:
+                state_monitor = Cls.PatientStateMonitor(parameters=params, outcomes=outcomes, index=0)
+            state_monitor.update_index(time_step=i % D.SIM_TIME_STEPS, new_state_index=D.HealthStates.WELL.value)
+
+    results = []
+    for name, func in (('PatientCostUtilityMonitor.update_index', update_cost_monitor),
+                       ('PatientStateMonitor.update_index', update_state_monitor)):
+        result = measure(func, n_repeats=n_repeats)
+        result.update({'name': name, 'time_per_call': result['min_time'] / N_MONITOR_UPDATES})
+        results.append(result)
+    return results
+
+
+def bench_calculate_cohort_outcomes(pop_sizes, n_repeats):
+    """ time to calculate the summary statistics and the survival curve of a simulated cohort """
+
+    results = []
+    params = P.get_parameters(therapy=P.Therapies.NONE)
+    for pop_size in pop_sizes:
+        cohort = Cls.Cohort(id=0, pop_size=pop_size, parameters=params)
+        cohort.simulate(n_time_steps=D.SIM_TIME_STEPS, engine=Cls.Engines.VECTORIZED)
+
+        def calculate():
+            outcomes = cohort.cohortOutcomes
+            outcomes.calculate_cohort_outcomes(initial_pop_size=pop_size)
+            # summary statistics and the survival curve are built when they are first accessed
+            for stat in (outcomes.statSurvivalTime, outcomes.statNumStrokes, outcomes.statCost, outcomes.statUtility):
+                stat.get_mean()
+            outcomes.nLivingPatients.get_values()
+
+        # (deampy is imported on the first call; its import time is measured by bench_import_time)
+        calculate()
+        result = measure(calculate, n_repeats=n_repeats)
+        result.update({'name': 'CohortOutcomes.calculate_cohort_outcomes', 'pop_size': pop_size})
+        results.append(result)
+    return results
+
+
+def check_equivalence(pop_size=EQUIVALENCE_POP_SIZE, alpha=EQUIVALENCE_ALPHA):
+    """ tests whether each engine estimates the expected outcomes calculated with the Markov trace
+    (a reference that does not depend on any engine, so a change shared by all engines is also detected) """
+
+    # simulated outcomes and their expected values in the deterministic cohort
+    outcomes = (('survivalTimes', 'statSurvivalTime'), ('nStrokes', 'statNumStrokes'),
+                ('costs', 'statCost'), ('utilities', 'statUtility'))
+
+    results = []
+    for therapy in P.Therapies:
+        params = P.get_parameters(therapy=therapy)
+
+        # expected outcomes
+        reference = Trace.DeterministicCohort(id=0, pop_size=pop_size, parameters=params)
+        reference.simulate(n_time_steps=D.SIM_TIME_STEPS)
+
+        for engine in Cls.Engines:
+            cohort = Cls.Cohort(id=0, pop_size=pop_size, parameters=params)
+            cohort.simulate(n_time_steps=D.SIM_TIME_STEPS, engine=engine)
+
+            for outcome, stat_name in outcomes:
+                x = np.asarray(getattr(cohort.cohortOutcomes, outcome), dtype=float)
+                expected_mean = float(getattr(reference.cohortOutcomes, stat_name).get_mean())
+                z = (x.mean() - expected_mean) / np.sqrt(x.var(ddof=1) / len(x))
+                p_value = 2 * (1 - NormalDist().cdf(abs(z)))
+                results.append({'name': 'equivalence', 'therapy': therapy.name, 'engine': engine.name,
+                                'outcome': outcome, 'mean': x.mean(), 'expected_mean': expected_mean,
+                                'p_value': p_value, 'passed': bool(p_value > alpha)})
+    return results
+
+
+def check_certain_stays(pop_size=1000):
+    """ tests whether each engine simulates the same patients as the per-patient engine when patients stay
+    in a state that is not absorbing with probability 1 (Well without mortality and strokes) """
+
+    params = P.get_parameters(therapy=P.Therapies.NONE, p_mortality=0, p_stroke=0)
+
+    # outcomes of the per-patient engine
+    reference = Cls.Cohort(id=0, pop_size=pop_size, parameters=params, if_record_paths=True)
+    reference.simulate(n_time_steps=D.SIM_TIME_STEPS, engine=Cls.Engines.PATIENT)
+
+    results = []
+    for engine in Cls.Engines:
+        if engine == Cls.Engines.PATIENT:
+            continue
+        cohort = Cls.Cohort(id=0, pop_size=pop_size, parameters=params, if_record_paths=True)
+        cohort.simulate(n_time_steps=D.SIM_TIME_STEPS, engine=engine)
+
+        for outcome in ('statePaths', 'patientSurvivalTimes', 'nStrokes', 'costs', 'utilities'):
+            x = np.asarray(getattr(cohort.cohortOutcomes, outcome), dtype=float)
+            y = np.asarray(getattr(reference.cohortOutcomes, outcome), dtype=float)
+            results.append({'name': 'certain_stays', 'engine': engine.name, 'outcome': outcome,
+                            'passed': bool(np.allclose(x, y, equal_nan=True))})
+    return results
+
+
+def run_benchmarks(pop_sizes=POP_SIZES, n_repeats=N_REPEATS):
+    """ :returns (dictionary) results of all benchmarks """
+
+    benchmarks = []
+    benchmarks.extend(bench_cohort_simulate(pop_sizes=pop_sizes, n_repeats=n_repeats))
+    benchmarks.extend(bench_patient_simulate(n_repeats=n_repeats))
+    benchmarks.extend(bench_monitor_update(n_repeats=n_repeats))
+    benchmarks.extend(bench_calculate_cohort_outcomes(pop_sizes=pop_sizes, n_repeats=n_repeats))
+
+    return {'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'benchmarks': benchmarks,
+            'startup': bench_import_time(n_repeats=n_repeats),
+            'equivalence': check_equivalence() + check_certain_stays()}
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the simulation hot path.')
+    parser.add_argument('--pop-sizes', type=int, nargs='+', default=POP_SIZES,
+                        help='cohort population sizes to benchmark')
+    parser.add_argument('--repeats', type=int, default=N_REPEATS,
+                        help='number of times each benchmark is repeated')
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help='file to write the results to')
+    args = parser.parse_args()
+
+    results = run_benchmarks(pop_sizes=args.pop_sizes, n_repeats=args.repeats)
+
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    # print a summary
+    for result in results['benchmarks']:
+        print('{:45s} {:12s} {:>9} {:10.4f} s {:8.1f} MB'.format(
+            result['name'], result.get('engine', ''), result.get('pop_size', ''),
+            result['min_time'], result['peak_memory'] / 1e6))
+    startup = results['startup']
+    print('Startup and import of the simulation core: {:.3f} s (budget {:.3f} s)'.format(
+        startup['min_time'], startup['budget']))
+    if not startup['passed']:
+        print('Startup check failed:', startup)
+    for result in results['equivalence']:
+        if not result['passed']:
+            print('Equivalence check failed:', result)
+    print('Results are written to', args.output)
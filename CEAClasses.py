@@ -0,0 +1,192 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+import deampy.format_functions as F
+import numpy as np
+
+import InputData as D
+from ProfilerClasses import profiled
+
+BOOTSTRAP_CHUNK_SIZE = 32   # number of bootstrap samples drawn together (the unit of work of a thread)
+
+
+class BootstrapCEA:
+    def __init__(self, sim_outcomes_none, sim_outcomes_anticoag, if_paired=False, if_observations_are_draws=False,
+                 wtp_range=D.WTP_RANGE, n_wtp_values=D.N_WTP_VALUES, n_bootstraps=D.N_BOOTSTRAPS,
+                 n_workers=D.N_BOOTSTRAP_WORKERS, seed=1, alpha=D.ALPHA):
+        """ cost-effectiveness and cost-benefit analyses of anticoagulation with respect to no therapy
+        where the uncertainty of the ICER and of the incremental net monetary benefit is estimated from
+        bootstrap samples of the mean outcomes (the resampled indices of a bootstrap sample are used for
+        costs and utilities, and the bootstrap means are reused for all willingness-to-pay values)
+        :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
+        :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagulation
+        :param if_paired: set to True if the costs and utilities of the two therapies are paired
+            (patients simulated with common random numbers or outcomes of the same parameter draws)
+        :param if_observations_are_draws: set to True if the paired observations are outcomes of parameter draws
+            of a probabilistic sensitivity analysis (the acceptability curves are then the share of draws in which
+            each therapy is optimal instead of the share of bootstrap samples)
+        :param wtp_range: (min, max) of willingness-to-pay values
+        :param n_wtp_values: number of willingness-to-pay values
+        :param n_bootstraps: number of bootstrap samples
+        :param n_workers: number of threads to draw bootstrap samples
+        :param seed: seed of the random number generator (the bootstrap samples do not depend on n_workers)
+        :param alpha: significance level
+        """
+
+        # observations of each therapy (no therapy first) as an array of shape (2, n_observations)
+        # with rows cost and utility
+        self.observations = [np.array([sim_outcomes.costs, sim_outcomes.utilities], dtype=float)
+                             for sim_outcomes in (sim_outcomes_none, sim_outcomes_anticoag)]
+        if if_paired and self.observations[0].shape != self.observations[1].shape:
+            raise ValueError('Paired outcomes should have the same number of observations.')
+        if if_observations_are_draws and not if_paired:
+            raise ValueError('Outcomes of parameter draws should be paired.')
+        self.ifPaired = if_paired
+        self.ifObservationsAreDraws = if_observations_are_draws
+        self.wtpValues = np.linspace(wtp_range[0], wtp_range[1], num=n_wtp_values, endpoint=True)
+        self.nBootstraps = n_bootstraps
+        self.nWorkers = n_workers
+        self.seed = seed
+        self.alpha = alpha
+
+        # incremental cost and utility of anticoagulation
+        self.incrementalCost = np.mean(self.observations[1][0]) - np.mean(self.observations[0][0])
+        self.incrementalUtility = np.mean(self.observations[1][1]) - np.mean(self.observations[0][1])
+
+        # bootstrap means of the incremental cost and utility, shape (n_bootstraps, )
+        self.bootstrapIncrementalCosts = None
+        self.bootstrapIncrementalUtilities = None
+
+        # expected incremental net monetary benefit of anticoagulation at each willingness-to-pay value
+        # and its confidence interval (shape (2, n_wtp_values))
+        self.incrementalNMBs = self.wtpValues * self.incrementalUtility - self.incrementalCost
+        self.incrementalNMBIntervals = None
+        # probability that each therapy (no therapy first) has the highest net monetary benefit
+        # at each willingness-to-pay value, shape (2, n_wtp_values)
+        self.acceptabilityCurves = None
+
+    @profiled()
+    def calculate(self):
+        """ draws the bootstrap samples and calculates the intervals and the acceptability curves """
+
+        self.bootstrapIncrementalCosts, self.bootstrapIncrementalUtilities = self._get_bootstrap_differences()
+
+        # bootstrap incremental net monetary benefits at all willingness-to-pay values,
+        # shape (n_bootstraps, n_wtp_values)
+        nmbs = np.multiply.outer(self.bootstrapIncrementalUtilities, self.wtpValues) \
+            - self.bootstrapIncrementalCosts[:, np.newaxis]
+        self.incrementalNMBIntervals = np.percentile(nmbs, [100 * self.alpha / 2, 100 * (1 - self.alpha / 2)],
+                                                     axis=0)
+
+        if self.ifObservationsAreDraws:
+            # the share of parameter draws in which anticoagulation is optimal
+            # (as in the acceptability curves of deampy)
+            d_costs = self.observations[1][0] - self.observations[0][0]
+            d_utilities = self.observations[1][1] - self.observations[0][1]
+            prob_anticoag = np.mean(np.multiply.outer(d_utilities, self.wtpValues) > d_costs[:, np.newaxis], axis=0)
+        else:
+            # the share of bootstrap samples in which anticoagulation is optimal
+            prob_anticoag = np.mean(nmbs > 0, axis=0)
+        self.acceptabilityCurves = np.array([1 - prob_anticoag, prob_anticoag])
+
+    def get_icer_interval(self, if_reversed=False):
+        """ :returns the bootstrap confidence interval of the ICER of anticoagulation
+        ([nan, nan] if the incremental utility of a bootstrap sample is not positive)
+        :param if_reversed: set to True for the ICER of no therapy with respect to anticoagulation
+        """
+
+        if self.ifPaired:
+            # basic bootstrap interval (as in deampy.statistics.RatioOfMeansStatPaired)
+            icer = self.incrementalCost / self.incrementalUtility
+            deltas = self.bootstrapIncrementalCosts / self.bootstrapIncrementalUtilities - icer
+            return icer - np.percentile(deltas, [100 * (1 - self.alpha / 2), 100 * self.alpha / 2])
+
+        # percentile interval (as in deampy.econ_eval.ICERIndp)
+        sign = -1 if if_reversed else 1
+        if np.any(sign * self.bootstrapIncrementalUtilities <= 0):
+            return np.array([np.nan, np.nan])
+        return np.percentile(self.bootstrapIncrementalCosts / self.bootstrapIncrementalUtilities,
+                             [100 * self.alpha / 2, 100 * (1 - self.alpha / 2)])
+
+    def get_ce_table(self, names=('No Therapy', 'Anticoagulation Therapy')):
+        """ :returns (list) rows of the cost-effectiveness table in the format of
+        deampy.econ_eval.CEA.export_ce_table (strategies in increasing order of cost)
+        :param names: names of no therapy and anticoagulation
+        """
+
+        import deampy.statistics as stat
+
+        difference_stat = stat.DifferenceStatPaired if self.ifPaired else stat.DifferenceStatIndp
+
+        rows = [['Strategy', 'Cost', 'Effect', 'Incremental Cost', 'Incremental Effect',
+                 'ICER (with confidence interval)']]
+        order = (0, 1) if self.incrementalCost >= 0 else (1, 0)
+        for i in order:
+            cost_stat = stat.SummaryStat(name='Cost', data=self.observations[i][0])
+            utility_stat = stat.SummaryStat(name='Effect', data=self.observations[i][1])
+            row = [names[i],
+                   cost_stat.get_formatted_mean_and_interval(interval_type='c', alpha=self.alpha, deci=0, form=','),
+                   utility_stat.get_formatted_mean_and_interval(interval_type='c', alpha=self.alpha, deci=2,
+                                                                form=',')]
+
+            base = order[0]
+            if i == base:
+                row += ['-', '-', '-']
+            elif (self.observations[i][1].mean() - self.observations[base][1].mean()) <= 0:
+                # the more costly therapy is not more effective
+                row += ['-', '-', 'Dominated']
+            else:
+                inc_cost = difference_stat(name='Incremental cost',
+                                           x=self.observations[i][0], y_ref=self.observations[base][0])
+                inc_utility = difference_stat(name='Incremental effect',
+                                              x=self.observations[i][1], y_ref=self.observations[base][1])
+                interval = self.get_icer_interval(if_reversed=(i == 0))
+                row += [inc_cost.get_formatted_mean_and_interval(interval_type='c', alpha=self.alpha, deci=0,
+                                                                 form=','),
+                        inc_utility.get_formatted_mean_and_interval(interval_type='c', alpha=self.alpha, deci=2,
+                                                                    form=','),
+                        F.format_estimate_interval(estimate=inc_cost.get_mean() / inc_utility.get_mean(),
+                                                   interval=interval, deci=2, sig_digits=4, format=',')]
+            rows.append(row)
+
+        return rows
+
+    def export_ce_table(self, file_name='CETable.csv'):
+        """ writes the cost-effectiveness table to a csv file """
+
+        with open(file_name, 'w', newline='') as file:
+            csv.writer(file).writerows(self.get_ce_table())
+
+    def _get_bootstrap_differences(self):
+        """ :returns (np.ndarray) bootstrap means of the incremental cost and utility of anticoagulation,
+        shape (2, n_bootstraps) """
+
+        # every chunk of bootstrap samples has its own random number generator
+        # (so that the samples do not depend on the number of threads)
+        n_chunks = -(-self.nBootstraps // BOOTSTRAP_CHUNK_SIZE)
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+        sizes = [min(BOOTSTRAP_CHUNK_SIZE, self.nBootstraps - c * BOOTSTRAP_CHUNK_SIZE) for c in range(n_chunks)]
+
+        if self.nWorkers == 1:
+            chunks = list(map(self._get_chunk_differences, seeds, sizes))
+        else:
+            with ThreadPoolExecutor(max_workers=self.nWorkers) as executor:
+                chunks = list(executor.map(self._get_chunk_differences, seeds, sizes))
+
+        return np.concatenate(chunks, axis=1)
+
+    def _get_chunk_differences(self, seed, size):
+        """ :returns (np.ndarray) means of the incremental cost and utility in a chunk of bootstrap samples,
+        shape (2, size) """
+
+        rng = np.random.default_rng(seed)
+
+        def get_means(observations):
+            # one matrix of resampled indices for the costs and utilities of all observations
+            indices = rng.integers(0, observations.shape[1], size=(size, observations.shape[1]), dtype=np.int32)
+            return np.array([np.take(values, indices).mean(axis=1) for values in observations])
+
+        # paired observations are resampled together, so only their differences are resampled
+        if self.ifPaired:
+            return get_means(self.observations[1] - self.observations[0])
+        return get_means(self.observations[1]) - get_means(self.observations[0])
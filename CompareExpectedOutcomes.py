@@ -0,0 +1,29 @@
+import InputData as D
+import MarkovTraceClasses as Trace
+import ParameterClasses as P
+import SupportMarkovModel as Support
+
+
+if __name__ == '__main__':
+
+    # expected outcomes under no therapy
+    cohort_none = Trace.DeterministicCohort(id=0,
+                                            pop_size=D.POP_SIZE,
+                                            parameters=P.get_parameters(therapy=P.Therapies.NONE))
+    cohort_none.simulate(n_time_steps=D.SIM_TIME_STEPS)
+
+    # expected outcomes under anticoagulation
+    cohort_anticoag = Trace.DeterministicCohort(id=1,
+                                                pop_size=D.POP_SIZE,
+                                                parameters=P.get_parameters(therapy=P.Therapies.ANTICOAG))
+    cohort_anticoag.simulate(n_time_steps=D.SIM_TIME_STEPS)
+
+    # print the expected outcomes (point estimates without confidence intervals)
+    Support.print_expected_outcomes(expected_outcomes=cohort_none.cohortOutcomes,
+                                    therapy_name=P.Therapies.NONE)
+    Support.print_expected_outcomes(expected_outcomes=cohort_anticoag.cohortOutcomes,
+                                    therapy_name=P.Therapies.ANTICOAG)
+
+    # report the CEA results
+    Support.report_expected_CEA_CBA(expected_outcomes_none=cohort_none.cohortOutcomes,
+                                    expected_outcomes_anticoag=cohort_anticoag.cohortOutcomes)
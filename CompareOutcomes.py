@@ -1,40 +1,86 @@
 import InputData as D
 import ParameterClasses as P
 import MarkovClasses as Cls
+import ReportClasses as Report
 import SupportMarkovModel as Support
+from ProfilerClasses import PROFILER
 
 
-# simulating mono therapy
-# create a cohort
-cohort_none = Cls.Cohort(id=0,
-                         pop_size=D.POP_SIZE,
-                         parameters=P.Parameters(therapy=P.Therapies.NONE))
-# simulate the cohort
-cohort_none.simulate(n_time_steps=D.SIM_TIME_STEPS)
+if __name__ == '__main__':
 
-# simulating combination therapy
-# create a cohort
-cohort_anticoag = Cls.Cohort(id=1,
+    if D.IF_PROFILE:
+        PROFILER.enable(track_memory=D.IF_PROFILE_MEMORY)
+
+    # simulating mono therapy
+    # create a cohort
+    cohort_none = Cls.Cohort(id=0,
                              pop_size=D.POP_SIZE,
-                             parameters=P.Parameters(therapy=P.Therapies.ANTICOAG))
-# simulate the cohort
-cohort_anticoag.simulate(n_time_steps=D.SIM_TIME_STEPS)
+                             parameters=P.get_parameters(therapy=P.Therapies.NONE),
+                             if_antithetic=D.IF_ANTITHETIC)
+
+    # simulating combination therapy
+    # create a cohort (with the same id to use the same random numbers of patients as the first cohort)
+    cohort_anticoag = Cls.Cohort(id=0 if D.IF_COMMON_RANDOM_NUMBERS else 1,
+                                 pop_size=D.POP_SIZE,
+                                 parameters=P.get_parameters(therapy=P.Therapies.ANTICOAG),
+                                 if_antithetic=D.IF_ANTITHETIC)
+
+    # simulate both cohorts (in parallel if N_WORKERS > 1)
+    if D.IF_SEQUENTIAL:
+        # until the confidence intervals are narrow enough or POP_SIZE patients are simulated
+        if_met = Cls.simulate_sequentially(cohorts=[cohort_none, cohort_anticoag],
+                                           n_time_steps=D.SIM_TIME_STEPS,
+                                           cost_tolerance=D.COST_TOLERANCE,
+                                           utility_tolerance=D.UTILITY_TOLERANCE,
+                                           nmb_tolerance=D.NMB_TOLERANCE,
+                                           wtp=D.WTP,
+                                           alpha=D.ALPHA,
+                                           batch_size=D.BATCH_SIZE,
+                                           n_workers=D.N_WORKERS)
+        print('Patients simulated in each cohort:', cohort_none.nSimulatedPatients,
+              '' if if_met else '(the confidence intervals are still wider than the tolerances)')
+        print('')
+    else:
+        Cls.simulate_cohorts(cohorts=[cohort_none, cohort_anticoag],
+                             n_time_steps=D.SIM_TIME_STEPS,
+                             n_workers=D.N_WORKERS)
+
+    # report the outcomes (in the background if REPORT_MODE is FILES or DATA_ONLY)
+    with Report.Reporter(mode=D.REPORT_MODE) as reporter:
+
+        # print the estimates for the mean survival time and mean time to AIDS
+        reporter.report(name='outcomes_none', func=Support.print_outcomes, data_func=Support.write_outcomes,
+                        sim_outcomes=cohort_none.cohortOutcomes,
+                        therapy_name=P.Therapies.NONE)
+        reporter.report(name='outcomes_anticoag', func=Support.print_outcomes, data_func=Support.write_outcomes,
+                        sim_outcomes=cohort_anticoag.cohortOutcomes,
+                        therapy_name=P.Therapies.ANTICOAG)
 
-# print the estimates for the mean survival time and mean time to AIDS
-Support.print_outcomes(sim_outcomes=cohort_none.cohortOutcomes,
-                       therapy_name=P.Therapies.NONE)
-Support.print_outcomes(sim_outcomes=cohort_anticoag.cohortOutcomes,
-                       therapy_name=P.Therapies.ANTICOAG)
+        # draw survival curves and histograms
+        reporter.report(name='survival_curves_and_histograms', func=Support.plot_survival_curves_and_histograms,
+                        sim_outcomes_none=cohort_none.cohortOutcomes,
+                        sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes)
 
-# draw survival curves and histograms
-Support.plot_survival_curves_and_histograms(sim_outcomes_none=cohort_none.cohortOutcomes,
-                                            sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes)
+        # print comparative outcomes
+        reporter.report(name='comparative_outcomes', func=Support.print_comparative_outcomes,
+                        sim_outcomes_none=cohort_none.cohortOutcomes,
+                        sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes,
+                        if_paired=D.IF_COMMON_RANDOM_NUMBERS)
 
+        # print how much variance reduction methods reduced the number of patients needed
+        reporter.report(name='variance_reduction', func=Support.print_variance_reduction,
+                        sim_outcomes_none=cohort_none.cohortOutcomes,
+                        sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes,
+                        if_paired=D.IF_COMMON_RANDOM_NUMBERS,
+                        if_antithetic=D.IF_ANTITHETIC)
 
-# print comparative outcomes
-Support.print_comparative_outcomes(sim_outcomes_none=cohort_none.cohortOutcomes,
-                                   sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes)
+        # report the CEA results
+        reporter.report(name='CEA', func=Support.report_CEA_CBA, data_func=Support.write_CE_table,
+                        sim_outcomes_none=cohort_none.cohortOutcomes,
+                        sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes,
+                        if_paired=D.IF_COMMON_RANDOM_NUMBERS)
 
-# report the CEA results
-Support.report_CEA_CBA(sim_outcomes_none=cohort_none.cohortOutcomes,
-                       sim_outcomes_anticoag=cohort_anticoag.cohortOutcomes)
+    if D.IF_PROFILE:
+        PROFILER.print_report()
+        PROFILER.write_report(file_name=D.PROFILE_REPORT_FILE)
+        PROFILER.write_chrome_trace(file_name=D.PROFILE_TRACE_FILE)
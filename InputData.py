@@ -2,15 +2,80 @@ from enum import Enum
 
 # simulation settings
 POP_SIZE = 50000         # cohort population size
-SIM_TIME_STEPS = 50    # length of simulation (years)
+SIM_LENGTH = 50     # length of simulation (years)
+CYCLE_LENGTH = 1    # length of a simulation time step (years), e.g. 1/12 for monthly cycles
+SIM_TIME_STEPS = round(SIM_LENGTH / CYCLE_LENGTH)    # number of simulation time steps
 ALPHA = 0.05        # significance level for calculating confidence intervals
 DISCOUNT = 0.03     # annual discount rate
+N_WORKERS = 1       # number of processes to simulate cohorts (None to use all cores)
+BLOCK_SIZE = 10000  # number of patients simulated together (the unit of parallel work)
+IF_COMMON_RANDOM_NUMBERS = True     # simulate both therapies with the same random numbers of patients
+IF_ANTITHETIC = False   # simulate patients in antithetic pairs
+
+# sequential simulation (patients are simulated in batches until the confidence intervals are narrow enough
+# or POP_SIZE patients are simulated)
+IF_SEQUENTIAL = False
+BATCH_SIZE = 10000          # number of patients simulated before checking the confidence intervals
+COST_TOLERANCE = 100        # largest acceptable half-width of the confidence interval of mean cost
+UTILITY_TOLERANCE = 0.05    # largest acceptable half-width of the confidence interval of mean utility
+NMB_TOLERANCE = 300         # ... of the incremental net monetary benefit (None to not check)
+WTP = 50000                 # willingness-to-pay per QALY to calculate the net monetary benefit
+
+
+# cost-effectiveness and cost-benefit analyses
+class CEABackends(Enum):
+    """ how the uncertainty of the outcomes of cost-effectiveness and cost-benefit analyses is calculated """
+    DEAMPY = 0  # with deampy.econ_eval (one bootstrap sample and one willingness-to-pay value at a time)
+    NUMPY = 1   # with CEAClasses.BootstrapCEA (bootstrap samples drawn in batches and reused for all WTP values)
+
+
+CEA_BACKEND = CEABackends.NUMPY
+WTP_RANGE = (0, 100000)     # range of willingness-to-pay values
+N_WTP_VALUES = 200          # number of willingness-to-pay values
+N_BOOTSTRAPS = 1000         # number of bootstrap samples to calculate the confidence intervals of ICER and NMB
+N_BOOTSTRAP_WORKERS = 4     # number of threads to draw bootstrap samples
+
+# profiling (wall time, number of calls and peak memory of the phases of a run)
+IF_PROFILE = False
+IF_PROFILE_MEMORY = False   # tracking memory slows down the code
+PROFILE_REPORT_FILE = 'profile_report.json'
+PROFILE_TRACE_FILE = 'profile_trace.json'     # to open in chrome://tracing or Perfetto
+
+
+class ReportModes(Enum):
+    """ how the outcomes of simulation are reported """
+    SHOW = 0        # figures are shown and outcomes are printed in this process
+    FILES = 1       # figures, printed outcomes and CSV/JSON outcomes are written to files in the background
+    DATA_ONLY = 2   # only CSV/JSON outcomes are written to files in the background (no figures)
+
+
+# reporting
+REPORT_MODE = ReportModes.SHOW
+OUTPUT_DIRECTORY = 'outputs'    # directory of the files written in modes FILES and DATA_ONLY
+N_REPORT_WORKERS = 2    # number of background processes to draw figures and build tables
 
 P_MORTALITY = 0.15  # annual probability of death due to all causes
 P_STROKE = 0.05         # annual probability of stroke in state Well
 P_RE_STROKE = 0.2     # annual probability of recurrent stroke
 P_SURV = 0.7       # probability of surviving a stroke
 
+# background mortality that rises with age
+IF_AGE_DEPENDENT_MORTALITY = False  # set to True to look up P_MORTALITY from LIFE_TABLE
+AGE_AT_START = 65   # age of patients at the start of simulation (years)
+# annual probability of death due to all causes from each age on (age, probability); illustrative values
+LIFE_TABLE = (
+    (65, 0.10),
+    (70, 0.13),
+    (75, 0.17),
+    (80, 0.23),
+    (85, 0.31),
+    (90, 0.42),
+    (95, 0.55),
+)
+
+STROKE_DURATION = 1/52  # duration of an acute stroke (years)
+STROKE_UTILITY = 0.2    # utility during an acute stroke
+
 
 class HealthStates(Enum):
     """ health states of patients """
@@ -27,7 +92,9 @@ ANNUAL_STATE_UTILITY = [
     0.9,        # POST- STROKE
     0,          # DEATH
     0,          # ALL_CAUSE_DEATH
-    0.2 * 1/52 + 0.9 * 51/52,     # STROKE WHEN CYCLE IS 1 YEAR
+    # STROKE: a year that starts with an acute stroke followed by Post-Stroke
+    # (adjusted to the cycle length in ParameterClasses)
+    STROKE_UTILITY * STROKE_DURATION + 0.9 * (1 - STROKE_DURATION),
 ]
 
 # annual cost of each health state
@@ -43,3 +110,53 @@ ANTICOAG_COST = 5000
 
 # anticoagulation relative risk in reducing stroke incidence while in “Post-Stroke”
 ANTICOAG_RR = 0.65
+# waning of the effect of anticoagulation: the relative risk is ANTICOAG_RR for ANTICOAG_EFFECT_DURATION years
+# and then returns to 1 linearly over ANTICOAG_WANING_PERIOD years (None for an effect that does not wane)
+ANTICOAG_EFFECT_DURATION = None
+ANTICOAG_WANING_PERIOD = 0
+
+# probabilistic sensitivity analysis
+PSA_N_DRAWS = 1000      # number of parameter draws
+PSA_POP_SIZE = 1000     # cohort population size for each parameter draw
+PSA_SEED = 1            # seed of the random number generator to sample parameters
+
+# distributions of the inputs for probabilistic sensitivity analysis
+# (name: (distribution, mean, standard deviation)) where distribution is 'beta', 'gamma' or 'lognormal'
+PSA_DISTRIBUTIONS = {
+    'P_MORTALITY': ('beta', P_MORTALITY, 0.02),
+    'P_STROKE': ('beta', P_STROKE, 0.01),
+    'P_RE_STROKE': ('beta', P_RE_STROKE, 0.03),
+    'P_SURV': ('beta', P_SURV, 0.05),
+    'ANTICOAG_RR': ('lognormal', ANTICOAG_RR, 0.1),
+    'ANTICOAG_COST': ('gamma', ANTICOAG_COST, 500),
+    'COST_POST_STROKE': ('gamma', ANNUAL_STATE_COST[HealthStates.POST_STROKE.value], 40),
+    'COST_STROKE': ('gamma', ANNUAL_STATE_COST[HealthStates.STROKE.value], 1000),
+    'UTILITY_POST_STROKE': ('beta', ANNUAL_STATE_UTILITY[HealthStates.POST_STROKE.value], 0.03),
+}
+
+
+class SensitivityMethods(Enum):
+    """ how the outcomes of the grid points of a one-way or two-way sensitivity analysis are calculated """
+    TRACE = 0       # expected outcomes of the Markov trace of all grid points at once (exact and fast)
+    SIMULATION = 1  # cohorts simulated with common random numbers (all grid points use the same cohort id)
+
+
+# one-way and two-way sensitivity analysis
+SENSITIVITY_METHOD = SensitivityMethods.TRACE
+SENSITIVITY_POP_SIZE = 10000    # cohort population size for each grid point (method SIMULATION)
+SENSITIVITY_N_POINTS = 5        # number of values of each input in a one-way sensitivity analysis
+# range (low, high) of each input in a one-way sensitivity analysis (tornado diagram)
+SENSITIVITY_RANGES = {
+    'p_mortality': (0.1, 0.2),
+    'p_stroke': (0.03, 0.07),
+    'p_re_stroke': (0.1, 0.3),
+    'p_surv': (0.6, 0.8),
+    'anticoag_rr': (0.5, 0.8),
+    'anticoag_cost': (3000, 7000),
+    'discount_rate': (0, 0.05),
+}
+# inputs and their values in a two-way sensitivity analysis
+TWO_WAY_INPUT_X = 'anticoag_rr'
+TWO_WAY_VALUES_X = (0.5, 0.575, 0.65, 0.725, 0.8)
+TWO_WAY_INPUT_Y = 'anticoag_cost'
+TWO_WAY_VALUES_Y = (3000, 4000, 5000, 6000, 7000)
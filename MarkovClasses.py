@@ -1,159 +1,1004 @@
-import deampy.econ_eval as econ
-import deampy.statistics as stat
+import os
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from math import floor, inf, log
+
 import numpy as np
-from deampy.markov import MarkovJumpProcess
-from deampy.plots.sample_paths import PrevalencePathBatchUpdate
 
-from InputData import HealthStates
+from InputData import BLOCK_SIZE, HealthStates
+from OnlineStatClasses import FixedBinHistogram, RunningStat, SurvivalCurve
+from ProfilerClasses import PROFILER, profiled
+
+
+# in simulation loops, health states are coded as integers (the values of HealthStates);
+# masks of the absorbing (death) states and of the state Stroke are indexed by these codes
+IF_ABSORBING = np.zeros(len(HealthStates), dtype=bool)
+IF_ABSORBING[[HealthStates.STROKE_DEATH.value, HealthStates.ALL_CAUSE_DEATH.value]] = True
+IF_ABSORBING.setflags(write=False)
+IF_STROKE = np.zeros(len(HealthStates), dtype=bool)
+IF_STROKE[HealthStates.STROKE.value] = True
+IF_STROKE.setflags(write=False)
+# (as lists of bools for the loops over patients, where indexing a list is faster than indexing an array)
+_IF_ABSORBING = IF_ABSORBING.tolist()
+_IF_STROKE = IF_STROKE.tolist()
+
+# number of blocks per process submitted to a pool of processes ahead of merging their outcomes
+PENDING_BLOCKS_PER_WORKER = 2
+
+
+class Engines(Enum):
+    """ engines to simulate the patients of a cohort """
+    PATIENT = 0     # simulates one Patient object at a time
+    VECTORIZED = 1  # simulates all patients of the cohort at once with NumPy arrays
+    EVENT_DRIVEN = 2    # simulates one Patient object at a time by sampling the time spent in each state
+    # (the event-driven engine needs transition probabilities that do not change over time)
+
+
+class MarkovSampler:
+    def __init__(self, parameters, seed=0, if_antithetic=False):
+        """ samples the health states of patients (built once per cohort and shared by its patients)
+        :param parameters: parameters of the cohort
+        :param seed: key of the counter-based random number generator
+        :param if_antithetic: set to True to pair patients 2i and 2i+1 as antithetic patients
+            (patient 2i+1 uses 1-u for every uniform random number u of patient 2i)
+        """
+
+        self.ifAntithetic = if_antithetic
+
+        # cumulative transition probabilities of each time step
+        # (row i of time step k is used to sample the next state from state i at time step k)
+        if parameters.ifTimeVarying:
+            self.cumProbSchedule = np.cumsum(parameters.probMatrixSchedule, axis=2)
+            self._cumProbRows = self.cumProbSchedule.tolist()
+        else:
+            # (the same rows at every time step)
+            cum_prob_matrix = np.cumsum(parameters.probMatrix, axis=1)
+            self.cumProbSchedule = np.broadcast_to(cum_prob_matrix, parameters.probMatrixSchedule.shape)
+            self._cumProbRows = [cum_prob_matrix.tolist()] * len(self.cumProbSchedule)
+        self._maxStateIndex = parameters.probMatrix.shape[0] - 1
+
+        # to sample the number of time steps patients stay in each state (geometric distribution)
+        # and the state they move to when they leave (probabilities of other states given leaving)
+        # (only used if the transition probabilities do not change over time)
+        prob_matrix = np.array(parameters.probMatrix)
+        self._logSelfProbs = []
+        self._exitCumProbRows = []
+        for i, row in enumerate(prob_matrix):
+            # (None if patients always leave the state and 0 if they never do)
+            if row[i] == 1:
+                self._logSelfProbs.append(0)
+            else:
+                self._logSelfProbs.append(log(row[i]) if row[i] > 0 else None)
+            exit_probs = row.copy()
+            exit_probs[i] = 0
+            if exit_probs.sum() > 0:
+                exit_probs /= exit_probs.sum()
+            self._exitCumProbRows.append(np.cumsum(exit_probs).tolist())
+
+        # one counter-based generator (Philox) serves all patients:
+        # the stream of patient i starts at counter (0, 0, i, 0), so streams of patients do not
+        # overlap and a patient's stream only depends on its id
+        self._bitGenerator = np.random.Philox(key=seed)
+        self._rng = np.random.Generator(self._bitGenerator)
+        self._state = self._bitGenerator.state
+
+    def get_uniforms(self, patient_id, n):
+        """
+        :param patient_id: patient id
+        :param n: number of uniform random numbers
+        :returns (list) the first n uniform random numbers of this patient's stream
+        """
+
+        if_antithetic = self.ifAntithetic and patient_id % 2 == 1
+        if if_antithetic:
+            # the antithetic of the stream of the other patient of the pair
+            patient_id -= 1
+
+        self._state['state']['counter'] = np.array([0, 0, patient_id, 0], dtype=np.uint64)
+        self._state['buffer_pos'] = 4   # discard numbers buffered from the previous patient
+        self._bitGenerator.state = self._state
+        rnds = self._rng.random(n)
+        if if_antithetic:
+            rnds = 1 - rnds
+        return rnds.tolist()
+
+    def get_step_uniforms(self, rng, n):
+        """
+        :param rng: random number generator of a group of patients
+        :param n: number of patients in the group
+        :returns (np.ndarray) a uniform random number for each patient of the group
+            (if antithetic, patient 2i+1 of the group gets 1-u where u is the number of patient 2i)
+        """
+
+        if not self.ifAntithetic:
+            return rng.random_sample(n)
+
+        rnds = np.empty(n)
+        u = rng.random_sample((n + 1) // 2)
+        rnds[0::2] = u
+        rnds[1::2] = 1 - u[:n // 2]
+        return rnds
+
+    def get_next_state(self, current_state_index, rnd, time_step=0):
+        """
+        :param current_state_index: index of the current health state
+        :param rnd: a uniform random number
+        :param time_step: the time step (to use its transition probabilities)
+        :returns (int) index of the next health state
+        """
+        return min(bisect_right(self._cumProbRows[time_step][current_state_index], rnd), self._maxStateIndex)
+
+    def get_n_stays(self, current_state_index, rnd):
+        """
+        :param current_state_index: index of the current health state
+        :param rnd: a uniform random number
+        :returns (int) number of time steps the patient stays in the current state before leaving
+            (sampled from the geometric distribution by inversion; inf if the patient never leaves the state)
+        """
+        log_self_prob = self._logSelfProbs[current_state_index]
+        if log_self_prob is None:
+            return 0
+        if log_self_prob == 0:
+            # the patient stays until the end of simulation (and get_exit_state() is not called)
+            return inf
+        return floor(log(1 - rnd) / log_self_prob)
+
+    def get_exit_state(self, current_state_index, rnd):
+        """
+        :param current_state_index: index of the current health state
+        :param rnd: a uniform random number
+        :returns (int) index of the state the patient moves to when leaving the current state
+        """
+        return min(bisect_right(self._exitCumProbRows[current_state_index], rnd), self._maxStateIndex)
+
+    def get_next_states(self, current_state_indices, rnds, time_step=0):
+        """
+        :param current_state_indices: (np.ndarray) indices of the current health states of patients
+        :param rnds: (np.ndarray) a uniform random number for each patient
+        :param time_step: the time step (to use its transition probabilities)
+        :returns (np.ndarray) indices of the next health states
+        """
+        next_states = (rnds[:, np.newaxis] >= self.cumProbSchedule[time_step][current_state_indices]).sum(axis=1)
+        return np.minimum(next_states, self._maxStateIndex)  # guard against round-off
 
 
 class Patient:
-    def __init__(self, id, parameters):
+    def __init__(self, id, parameters, outcomes=None, index=0, sampler=None):
+        """
+        :param id: patient id
+        :param parameters: parameters of the patient's cohort
+        :param outcomes: (CohortOutcomes) the store to write the outcomes of this patient to
+            (if not provided, a store for one patient is created)
+        :param index: index of this patient in the store
+        :param sampler: (MarkovSampler) sampler of the patient's cohort
+            (if not provided, a sampler is built from parameters)
+        """
 
         self.id = id
         self.params = parameters
-        self.stateMonitor = PatientStateMonitor(parameters=self.params)
+        if outcomes is None:
+            outcomes = CohortOutcomes(pop_size=1, cycle_length=parameters.cycleLength)
+        if sampler is None:
+            sampler = MarkovSampler(parameters=parameters)
+        self.sampler = sampler
+        self.stateMonitor = PatientStateMonitor(parameters=self.params, outcomes=outcomes, index=index)
 
     def simulate(self, n_time_steps):
 
-        # random number generator
-        rng = np.random.RandomState(seed=self.id)
-        # Markov jump process
-        markov_jump = MarkovJumpProcess(transition_prob_matrix=self.params.probMatrix)
+        # uniform random numbers of this patient (one per time step)
+        rnds = self.sampler.get_uniforms(patient_id=self.id, n=n_time_steps)
 
         k = 0  # simulation time step
 
         # while the patient is alive and simulation length is not yet reached
         while self.stateMonitor.get_if_alive() and k < n_time_steps:
-            # sample from the Markov jump process to get a new state
-            # (returns an integer from {0, 1, 2, ...})
-            new_state_index = markov_jump.get_next_state(
-                current_state_index=self.stateMonitor.currentState.value,
-                rng=rng)
+            # sample a new state (returns an integer from {0, 1, 2, ...})
+            new_state_index = self.sampler.get_next_state(
+                current_state_index=self.stateMonitor.currentStateIndex,
+                rnd=rnds[k],
+                time_step=k)
 
             # update health state
-            self.stateMonitor.update(time_step=k, new_state=HealthStates(new_state_index))
+            self.stateMonitor.update_index(time_step=k, new_state_index=new_state_index)
 
             # increment time
             k += 1
 
+    def simulate_event_driven(self, n_time_steps):
+        """ simulates the patient by sampling the number of time steps spent in each state
+        and the state it moves to next (instead of sampling the state of every time step) """
+
+        # uniform random numbers of this patient (at most 2 per time step)
+        rnds = self.sampler.get_uniforms(patient_id=self.id, n=2 * n_time_steps)
+        i = 0   # index of the next random number
+
+        k = 0  # simulation time step
+
+        # while the patient is alive and simulation length is not yet reached
+        while self.stateMonitor.get_if_alive() and k < n_time_steps:
+            current_state_index = self.stateMonitor.currentStateIndex
+
+            # number of time steps to stay in the current state (truncated at the end of simulation)
+            n_stays = min(self.sampler.get_n_stays(current_state_index=current_state_index, rnd=rnds[i]),
+                          n_time_steps - k)
+            i += 1
+            if n_stays > 0:
+                self.stateMonitor.update_sojourn(time_step=k, n_time_steps=n_stays)
+                k += n_stays
+
+            if k < n_time_steps:
+                # sample the state to move to
+                new_state_index = self.sampler.get_exit_state(current_state_index=current_state_index,
+                                                              rnd=rnds[i])
+                i += 1
+                self.stateMonitor.update_index(time_step=k, new_state_index=new_state_index)
+                k += 1
+
 
 class PatientStateMonitor:
-    def __init__(self, parameters):
+    def __init__(self, parameters, outcomes, index):
+
+        # index of the current health state (the value of HealthStates)
+        self.currentStateIndex = parameters.initialHealthState.value    # assuming everyone starts in "Well"
+        self.cycleLength = parameters.cycleLength
+        self.outcomes = outcomes
+        self.index = index
+        self.costUtilityMonitor = PatientCostUtilityMonitor(parameters=parameters, outcomes=outcomes, index=index)
+
+    @property
+    def currentState(self):
+        return HealthStates(self.currentStateIndex)
 
-        self.currentState = parameters.initialHealthState    # assuming everyone starts in "Well"
-        self.survivalTime = None
-        self.nStrokes = 0
-        self.costUtilityMonitor = PatientCostUtilityMonitor(parameters=parameters)
+    @property
+    def survivalTime(self):
+        survival_time = self.outcomes.patientSurvivalTimes[self.index]
+        return None if np.isnan(survival_time) else float(survival_time)
+
+    @property
+    def nStrokes(self):
+        return int(self.outcomes.nStrokes[self.index])
 
     def update(self, time_step, new_state):
+        """
+        :param time_step: the time step of the transition
+        :param new_state: (HealthStates) the health state at the end of the time step
+        """
+        self.update_index(time_step=time_step, new_state_index=new_state.value)
+
+    def update_index(self, time_step, new_state_index):
+        """ same as update() for a health state given by its index (used by the simulation loops)
+        :param time_step: the time step of the transition
+        :param new_state_index: (int) index of the health state at the end of the time step
+        """
 
-        if not self.get_if_alive():
+        if _IF_ABSORBING[self.currentStateIndex]:
             return
 
-        if new_state in (HealthStates.STROKE_DEATH, HealthStates.ALL_CAUSE_DEATH):
-            self.survivalTime = time_step + 0.5  # correct for half cycle effect
+        if _IF_ABSORBING[new_state_index]:
+            # correct for half cycle effect
+            self.outcomes.patientSurvivalTimes[self.index] = (time_step + 0.5) * self.cycleLength
 
-        if new_state == HealthStates.STROKE:
-            self.nStrokes += 1
+        if _IF_STROKE[new_state_index]:
+            self.outcomes.nStrokes[self.index] += 1
 
-        self.costUtilityMonitor.update(t=time_step,
-                                       current_state=self.currentState,
-                                       next_state=new_state)
-        self.currentState = new_state
+        self.costUtilityMonitor.update_index(t=time_step,
+                                             current_state_index=self.currentStateIndex,
+                                             next_state_index=new_state_index)
+        self.currentStateIndex = new_state_index
+
+        if self.outcomes.statePaths is not None:
+            if _IF_ABSORBING[new_state_index]:
+                # the patient stays in this state until the end of simulation
+                self.outcomes.statePaths[self.index, time_step:] = new_state_index
+            else:
+                self.outcomes.statePaths[self.index, time_step] = new_state_index
+
+    def update_sojourn(self, time_step, n_time_steps):
+        """ updates the outcomes of staying in the current state for n_time_steps time steps
+        starting at time_step """
+
+        self.costUtilityMonitor.update_sojourn(t=time_step,
+                                               n_time_steps=n_time_steps,
+                                               state_index=self.currentStateIndex)
+
+        if self.outcomes.statePaths is not None:
+            self.outcomes.statePaths[self.index, time_step:time_step + n_time_steps] = self.currentStateIndex
 
     def get_if_alive(self):
-        if self.currentState in (HealthStates.STROKE_DEATH, HealthStates.ALL_CAUSE_DEATH):
-            return False
-        else:
-            return True
+        return not _IF_ABSORBING[self.currentStateIndex]
 
 
 class PatientCostUtilityMonitor:
-    def __init__(self, parameters):
+    def __init__(self, parameters, outcomes, index):
 
         self.params = parameters
-        self.totalDiscountedCost = 0
-        self.totalDiscountedUtility = 0
+        self.outcomes = outcomes
+        self.index = index
+
+    @property
+    def totalDiscountedCost(self):
+        return float(self.outcomes.costs[self.index])
+
+    @property
+    def totalDiscountedUtility(self):
+        return float(self.outcomes.utilities[self.index])
 
     def update(self, t, current_state, next_state):
+        """
+        :param t: the time step of the transition
+        :param current_state: (HealthStates) the health state at the start of the time step
+        :param next_state: (HealthStates) the health state at the end of the time step
+        """
+        self.update_index(t=t, current_state_index=current_state.value, next_state_index=next_state.value)
+
+    def update_index(self, t, current_state_index, next_state_index):
+        """ same as update() for health states given by their indices (used by the simulation loops) """
+
+        # half-cycle corrected cost and utility of this transition and the discount factor of time step t
+        # are precomputed in parameters
+        discount = self.params.discountFactors[t]
 
-        cost = 0.5 * (self.params.annualStateCosts[current_state.value] +
-                      self.params.annualStateCosts[next_state.value])
+        self.outcomes.costs[self.index] += \
+            self.params.transitionCosts[current_state_index, next_state_index] * discount
+        self.outcomes.utilities[self.index] += \
+            self.params.transitionUtilities[current_state_index, next_state_index] * discount
 
-        utility = 0.5 * (self.params.annualStateUtilities[current_state.value] +
-                         self.params.annualStateUtilities[next_state.value])
+    def update_sojourn(self, t, n_time_steps, state_index):
+        """ accrues the cost and utility of staying in a state (given by its index)
+        for n_time_steps time steps starting at t """
 
-        self.totalDiscountedCost += econ.pv_single_payment(payment=cost,
-                                                           discount_rate=self.params.discountRate/2,
-                                                           discount_period=2 * t+1)
-        self.totalDiscountedUtility += econ.pv_single_payment(payment=utility,
-                                                              discount_rate=self.params.discountRate/2,
-                                                              discount_period=2 * t+1)
+        discount_sum = self.params.get_discount_sum(time_step=t, n_time_steps=n_time_steps)
+
+        self.outcomes.costs[self.index] += self.params.transitionCosts[state_index, state_index] * discount_sum
+        self.outcomes.utilities[self.index] += \
+            self.params.transitionUtilities[state_index, state_index] * discount_sum
 
 
 class Cohort:
-    def __init__(self, id, pop_size, parameters):
+    def __init__(self, id, pop_size, parameters, if_streaming=False, if_record_paths=False, state_paths_file=None,
+                 if_antithetic=False):
+        """
+        :param id: cohort id
+        :param pop_size: population size
+        :param parameters: parameters of the cohort
+        :param if_streaming: set to True to keep running statistics of outcomes instead of
+            the outcomes of every patient (memory does not grow with the population size)
+        :param if_record_paths: set to True to record the health state of every patient at every
+            time step (so that outcomes can be re-calculated with score_state_paths())
+        :param state_paths_file: name of a .npy file to record the state paths to
+            (the file is memory-mapped, so the paths of large cohorts do not need to fit in memory;
+            outcomes can be re-calculated from this file with replay_state_paths())
+        :param if_antithetic: set to True to simulate patients in antithetic pairs (patients 2i and 2i+1)
+            (to simulate two therapies with common random numbers, give their cohorts the same id)
+        """
+        if if_antithetic and (pop_size % 2 == 1 or BLOCK_SIZE % 2 == 1):
+            raise ValueError('Population size and block size should be even to simulate antithetic pairs.')
+        if state_paths_file is not None:
+            if_record_paths = True
+        if if_streaming and if_record_paths:
+            raise ValueError('State paths cannot be recorded when outcomes are streamed.')
+
         self.id = id
         self.popSize = pop_size
         self.params = parameters
-        self.cohortOutcomes = CohortOutcomes()
+        self.ifStreaming = if_streaming
+        self.ifRecordPaths = if_record_paths
+        self.statePathsFile = state_paths_file
+        self.ifAntithetic = if_antithetic
+        self.nSimulatedPatients = 0  # number of patients simulated (less than pop_size if stopped early)
+        if if_streaming:
+            self.cohortOutcomes = StreamingCohortOutcomes(cycle_length=parameters.cycleLength)
+        else:
+            self.cohortOutcomes = CohortOutcomes(pop_size=pop_size, cycle_length=parameters.cycleLength)
+
+    @profiled()
+    def simulate(self, n_time_steps, engine=Engines.PATIENT, n_workers=1):
+        """ simulates the cohort
+        :param n_time_steps: number of simulation time steps
+        :param engine: (Engines) the engine to simulate the patients with
+        :param n_workers: number of processes to simulate the blocks of patients
+            (1 to simulate in this process, None to use all cores)
+        """
 
-    def simulate(self, n_time_steps):
+        simulate_cohorts(cohorts=[self], n_time_steps=n_time_steps, engine=engine, n_workers=n_workers)
+
+    def simulate_sequentially(self, n_time_steps, cost_tolerance, utility_tolerance, alpha=0.05,
+                              batch_size=BLOCK_SIZE, engine=Engines.PATIENT, n_workers=1):
+        """ simulates the cohort in batches of patients until the confidence intervals of the mean cost
+        and utility are narrow enough (the population size is the maximum number of patients to simulate)
+        :param n_time_steps: number of simulation time steps
+        :param cost_tolerance: largest acceptable half-width of the confidence interval of mean cost
+        :param utility_tolerance: largest acceptable half-width of the confidence interval of mean utility
+        :param alpha: significance level of confidence intervals
+        :param batch_size: number of patients simulated before checking the confidence intervals
+        :param engine: (Engines) the engine to simulate the patients with
+        :param n_workers: number of processes (1 to simulate in this process, None to use all cores)
+        :returns (bool) True if the confidence intervals are narrow enough
+        """
 
-        # populate the cohort
-        for i in range(self.popSize):
+        return simulate_sequentially(cohorts=[self], n_time_steps=n_time_steps,
+                                     cost_tolerance=cost_tolerance, utility_tolerance=utility_tolerance,
+                                     alpha=alpha, batch_size=batch_size, engine=engine, n_workers=n_workers)
+
+
+@profiled()
+def simulate_cohorts(cohorts, n_time_steps, engine=Engines.PATIENT, n_workers=1):
+    """ simulates a list of cohorts by splitting each cohort into blocks of BLOCK_SIZE patients
+    and simulating all blocks of all cohorts in a pool of processes
+    (the outcomes do not depend on the number of processes since every block
+    draws its random numbers from the ids of its cohort and patients)
+    :param cohorts: (list) cohorts to simulate
+    :param n_time_steps: number of simulation time steps
+    :param engine: (Engines) the engine to simulate the patients with
+    :param n_workers: number of processes (1 to simulate in this process, None to use all cores)
+    """
+
+    for cohort in cohorts:
+        if cohort.ifRecordPaths:
+            cohort.cohortOutcomes.allocate_state_paths(n_time_steps=n_time_steps, file_name=cohort.statePathsFile)
+
+    if n_workers == 1:
+        _simulate_patients(cohorts=cohorts, first=0, last=max(c.popSize for c in cohorts),
+                           n_time_steps=n_time_steps, engine=engine)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            _simulate_patients(cohorts=cohorts, first=0, last=max(c.popSize for c in cohorts),
+                               n_time_steps=n_time_steps, engine=engine, executor=executor,
+                               max_pending_blocks=_get_max_pending_blocks(n_workers))
+
+    for cohort in cohorts:
+        _finish_cohort(cohort=cohort, n_simulated_patients=cohort.popSize, n_time_steps=n_time_steps)
+
+
+@profiled()
+def simulate_sequentially(cohorts, n_time_steps, cost_tolerance, utility_tolerance, nmb_tolerance=None, wtp=None,
+                          alpha=0.05, batch_size=BLOCK_SIZE, engine=Engines.PATIENT, n_workers=1):
+    """ simulates a list of cohorts in batches of patients until the confidence intervals of the mean cost and
+    utility of every cohort (and optionally of the incremental net monetary benefit of the second cohort
+    with respect to the first) are narrow enough, or the population size of cohorts is reached
+    (batch b of a cohort is its patients b*batch_size, ..., (b+1)*batch_size-1 whose random numbers only depend
+    on their ids, so the first n patients simulated sequentially are the first n patients of simulate_cohorts())
+    :param cohorts: (list) cohorts to simulate (the population size is the maximum number of patients to simulate)
+    :param n_time_steps: number of simulation time steps
+    :param cost_tolerance: largest acceptable half-width of the confidence interval of mean cost
+    :param utility_tolerance: largest acceptable half-width of the confidence interval of mean utility
+    :param nmb_tolerance: largest acceptable half-width of the confidence interval of the incremental
+        net monetary benefit (None to not check); the list should have two cohorts and the patients of
+        the two cohorts are paired if they have the same id (common random numbers)
+    :param wtp: willingness-to-pay per unit of utility to calculate the net monetary benefit
+    :param alpha: significance level of confidence intervals
+    :param batch_size: number of patients of each cohort simulated before checking the confidence intervals
+        (a multiple of BLOCK_SIZE)
+    :param engine: (Engines) the engine to simulate the patients with
+    :param n_workers: number of processes (1 to simulate in this process, None to use all cores)
+    :returns (bool) True if the confidence intervals are narrow enough
+    """
+
+    if batch_size % BLOCK_SIZE != 0:
+        raise ValueError('Batch size should be a multiple of the block size ({}).'.format(BLOCK_SIZE))
+    if nmb_tolerance is not None and (len(cohorts) != 2 or wtp is None):
+        raise ValueError('Two cohorts and a willingness-to-pay are needed to check the incremental net monetary '
+                         'benefit.')
+
+    for cohort in cohorts:
+        if cohort.ifRecordPaths:
+            cohort.cohortOutcomes.allocate_state_paths(n_time_steps=n_time_steps, file_name=cohort.statePathsFile)
+
+    # running statistics of the cost and utility of each cohort
+    cost_stats = [RunningStat(name='Discounted cost') for c in cohorts]
+    utility_stats = [RunningStat(name='Discounted utility') for c in cohorts]
+    # running statistics of the incremental net monetary benefit (if paired)
+    # or of the net monetary benefit of each cohort (if independent)
+    if_paired = nmb_tolerance is not None and cohorts[0].id == cohorts[1].id \
+        and cohorts[0].popSize == cohorts[1].popSize and cohorts[0].ifAntithetic == cohorts[1].ifAntithetic
+    nmb_stats = [RunningStat(name='Net monetary benefit') for c in (cohorts[:1] if if_paired else cohorts)]
+
+    executor = None if n_workers == 1 else ProcessPoolExecutor(max_workers=n_workers)
+    try:
+        first = 0
+        if_met = False
+        while not if_met and first < max(c.popSize for c in cohorts):
+            batch_outcomes = _simulate_patients(cohorts=cohorts, first=first, last=first + batch_size,
+                                                n_time_steps=n_time_steps, engine=engine, executor=executor,
+                                                max_pending_blocks=_get_max_pending_blocks(n_workers),
+                                                if_return_outcomes=True)
+            first += batch_size
+
+            # update the running statistics with the outcomes of this batch
+            nmbs = []
+            for cohort, (costs, utilities), cost_stat, utility_stat in zip(cohorts, batch_outcomes,
+                                                                           cost_stats, utility_stats):
+                cost_stat.record_batch(data=_get_independent_observations(costs, if_antithetic=cohort.ifAntithetic))
+                utility_stat.record_batch(
+                    data=_get_independent_observations(utilities, if_antithetic=cohort.ifAntithetic))
+                nmbs.append(wtp * utilities - costs if nmb_tolerance is not None else None)
+            if nmb_tolerance is not None:
+                if if_paired:
+                    nmb_stats[0].record_batch(
+                        data=_get_independent_observations(nmbs[1] - nmbs[0], if_antithetic=cohorts[0].ifAntithetic))
+                else:
+                    for cohort, nmb, nmb_stat in zip(cohorts, nmbs, nmb_stats):
+                        nmb_stat.record_batch(
+                            data=_get_independent_observations(nmb, if_antithetic=cohort.ifAntithetic))
+
+            # check the half-widths of confidence intervals
+            if_met = all(s.get_half_width(alpha=alpha) <= cost_tolerance for s in cost_stats) \
+                and all(s.get_half_width(alpha=alpha) <= utility_tolerance for s in utility_stats)
+            if nmb_tolerance is not None:
+                # (the half-width of the difference of two independent means)
+                nmb_half_width = np.sqrt(sum(s.get_half_width(alpha=alpha) ** 2 for s in nmb_stats))
+                if_met = if_met and nmb_half_width <= nmb_tolerance
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for cohort in cohorts:
+        _finish_cohort(cohort=cohort, n_simulated_patients=min(first, cohort.popSize),
+                       n_time_steps=n_time_steps)
+
+    return if_met
+
+
+def _simulate_patients(cohorts, first, last, n_time_steps, engine, executor=None, max_pending_blocks=1,
+                       if_return_outcomes=False):
+    """ simulates the patients first, ..., last-1 of each cohort in blocks of BLOCK_SIZE patients
+    (the outcomes of blocks are copied, or added, to the outcomes of their cohort and then dropped,
+    so the memory used by streaming cohorts does not grow with the population size)
+    :param executor: (ProcessPoolExecutor) the pool of processes to simulate the blocks in
+        (None to simulate in this process)
+    :param max_pending_blocks: largest number of blocks submitted to the pool of processes and not yet merged
+    :param if_return_outcomes: set to True to return the costs and utilities of the simulated patients
+    :returns (list) for each cohort, the costs and utilities of its simulated patients as an array of
+        shape (2, n_simulated_patients) (None if if_return_outcomes is False)
+    """
+
+    # costs and utilities of the blocks of each cohort
+    block_outcomes = [[] for cohort in cohorts]
+    if executor is None:
+        for cohort, blocks in zip(cohorts, block_outcomes):
+            for block_first in range(first, min(last, cohort.popSize), BLOCK_SIZE):
+                block_last = min(block_first + BLOCK_SIZE, cohort.popSize)
+                if cohort.ifStreaming:
+                    # outcomes of the block are added to the running statistics of the cohort
+                    outcomes = simulate_block(cohort.id, cohort.popSize, cohort.params, block_first, block_last,
+                                              n_time_steps, engine, if_antithetic=cohort.ifAntithetic)
+                    cohort.cohortOutcomes.merge(other=outcomes, first=block_first)
+                else:
+                    # blocks write their outcomes directly to the outcomes of their cohort
+                    outcomes = simulate_block(
+                        cohort.id, cohort.popSize, cohort.params, block_first, block_last, n_time_steps, engine,
+                        outcomes=cohort.cohortOutcomes.get_block(first=block_first, last=block_last),
+                        if_antithetic=cohort.ifAntithetic)
+                if if_return_outcomes:
+                    blocks.append((outcomes.costs, outcomes.utilities))
+    else:
+        # blocks are submitted in a bounded window and the outcomes of each block are copied (or added)
+        # to the outcomes of its cohort in the order of submission as soon as the block is simulated
+        # (so at most max_pending_blocks blocks are held in memory)
+        pending = deque()
+        for cohort, blocks in zip(cohorts, block_outcomes):
+            for block_first in range(first, min(last, cohort.popSize), BLOCK_SIZE):
+                future = executor.submit(simulate_block, cohort.id, cohort.popSize, cohort.params,
+                                         block_first, min(block_first + BLOCK_SIZE, cohort.popSize),
+                                         n_time_steps, engine, None, cohort.ifRecordPaths, cohort.ifAntithetic)
+                pending.append((cohort, blocks, block_first, future))
+                if len(pending) >= max_pending_blocks:
+                    _merge_block(*pending.popleft(), if_return_outcomes=if_return_outcomes)
+        while pending:
+            _merge_block(*pending.popleft(), if_return_outcomes=if_return_outcomes)
+
+    if not if_return_outcomes:
+        return None
+    return [np.concatenate(blocks, axis=1) if blocks else np.empty((2, 0)) for blocks in block_outcomes]
+
+
+def _get_max_pending_blocks(n_workers):
+    """ :returns the number of blocks that keeps a pool of processes busy
+    :param n_workers: number of processes (None to use all cores)
+    """
+
+    return PENDING_BLOCKS_PER_WORKER * (n_workers or os.cpu_count() or 1)
+
+
+def _merge_block(cohort, blocks, block_first, future, if_return_outcomes):
+    """ copies (or adds) the outcomes of a block simulated in a pool of processes to the outcomes of its cohort
+    :param cohort: the cohort of the block
+    :param blocks: (list) the costs and utilities of the blocks of the cohort (to append the block's to)
+    :param block_first: index of the first patient of the block
+    :param future: (Future) the simulation of the block
+    :param if_return_outcomes: set to True to append the costs and utilities of the block to blocks
+    """
+
+    outcomes = future.result()
+    cohort.cohortOutcomes.merge(other=outcomes, first=block_first)
+    if if_return_outcomes:
+        blocks.append((outcomes.costs, outcomes.utilities))
+
+
+def _finish_cohort(cohort, n_simulated_patients, n_time_steps):
+    """ calculates the outcomes of a cohort after its first n_simulated_patients patients are simulated
+    over n_time_steps time steps """
+
+    cohort.nSimulatedPatients = n_simulated_patients
+    if not cohort.ifStreaming and n_simulated_patients < cohort.popSize:
+        # outcomes of patients who are not simulated are dropped
+        cohort.cohortOutcomes = cohort.cohortOutcomes.get_block(first=0, last=n_simulated_patients)
+        # (and so are the rows of their state paths in the file, which would otherwise be replayed as
+        # patients who stay Well)
+        if cohort.statePathsFile is not None:
+            cohort.cohortOutcomes.statePaths = _truncate_state_paths_file(
+                state_paths=cohort.cohortOutcomes.statePaths, file_name=cohort.statePathsFile)
+
+    # write the state paths recorded in a file to disk
+    if cohort.ifRecordPaths and isinstance(cohort.cohortOutcomes.statePaths, np.memmap):
+        cohort.cohortOutcomes.statePaths.flush()
+    # calculate cohort outcomes
+    cohort.cohortOutcomes.calculate_cohort_outcomes(initial_pop_size=n_simulated_patients, n_time_steps=n_time_steps)
+
+
+def _truncate_state_paths_file(state_paths, file_name):
+    """ rewrites the .npy file of state paths so that it only contains the given rows
+    :param state_paths: (np.memmap) the first rows of the memory-mapped file
+    :param file_name: name of the .npy file
+    :returns (np.memmap) the state paths in the rewritten file
+    """
+
+    temp_file_name = file_name + '.tmp.npy'
+    truncated = np.lib.format.open_memmap(temp_file_name, mode='w+', dtype=np.uint8, shape=state_paths.shape)
+    # rows are copied in blocks so that the memory used does not grow with the population size
+    for first in range(0, state_paths.shape[0], BLOCK_SIZE):
+        truncated[first:first + BLOCK_SIZE] = state_paths[first:first + BLOCK_SIZE]
+    truncated.flush()
+    del truncated
+
+    os.replace(temp_file_name, file_name)
+    return np.load(file_name, mmap_mode='r+')
+
+
+def _get_independent_observations(observations, if_antithetic):
+    """ :returns the means of antithetic pairs of observations (which are independent) if if_antithetic
+    is True and the observations otherwise """
+
+    if if_antithetic:
+        return observations.reshape(-1, 2).mean(axis=1)
+    return observations
+
+
+@profiled()
+def simulate_block(cohort_id, pop_size, parameters, first, last, n_time_steps, engine=Engines.PATIENT,
+                   outcomes=None, if_record_paths=False, if_antithetic=False):
+    """ simulates the patients first, first+1, ..., last-1 of a cohort
+    :param cohort_id: id of the cohort
+    :param pop_size: population size of the cohort
+    :param parameters: parameters of the cohort
+    :param first: index of the first patient of this block
+    :param last: index of the last patient of this block plus 1
+    :param n_time_steps: number of simulation time steps
+    :param engine: (Engines) the engine to simulate the patients with
+    :param outcomes: (CohortOutcomes) the store for the outcomes of the patients of this block
+        (if not provided, a new store is created)
+    :param if_record_paths: set to True to record the state paths of patients in a new store
+    :param if_antithetic: set to True to simulate patients in antithetic pairs
+    :returns (CohortOutcomes) outcomes of the simulated patients (cohort outcomes are not calculated)
+    """
+
+    if engine == Engines.EVENT_DRIVEN and parameters.ifTimeVarying:
+        raise ValueError('The event-driven engine needs transition probabilities that do not change over time.')
+
+    if outcomes is None:
+        outcomes = CohortOutcomes(pop_size=last - first, cycle_length=parameters.cycleLength)
+        if if_record_paths:
+            outcomes.allocate_state_paths(n_time_steps=n_time_steps)
+
+    # sampler shared by all patients of this block
+    with PROFILER.phase('MarkovSampler.__init__'):
+        sampler = MarkovSampler(parameters=parameters, if_antithetic=if_antithetic)
+
+    if engine == Engines.VECTORIZED:
+        with PROFILER.phase('_simulate_vectorized'):
+            _simulate_vectorized(outcomes=outcomes,
+                                 parameters=parameters,
+                                 sampler=sampler,
+                                 n_time_steps=n_time_steps,
+                                 rng=np.random.RandomState(seed=[cohort_id, first]))
+    else:
+        for i in range(first, last):
             # create a new patient (use id * pop_size + n as patient id)
-            patient = Patient(id=self.id * self.popSize + i,
-                              parameters=self.params)
+            # that stores its outcomes in the block's store
+            with PROFILER.phase('Patient.__init__'):
+                patient = Patient(id=cohort_id * pop_size + i,
+                                  parameters=parameters,
+                                  outcomes=outcomes,
+                                  index=i - first,
+                                  sampler=sampler)
             # simulate
-            patient.simulate(n_time_steps)
-
-            # store outputs of this simulation
-            self.cohortOutcomes.extract_outcome(simulated_patient=patient)
-
-        # calculate cohort outcomes
-        self.cohortOutcomes.calculate_cohort_outcomes(initial_pop_size=self.popSize)
+            if engine == Engines.EVENT_DRIVEN:
+                with PROFILER.phase('Patient.simulate_event_driven'):
+                    patient.simulate_event_driven(n_time_steps)
+            else:
+                with PROFILER.phase('Patient.simulate'):
+                    patient.simulate(n_time_steps)
+
+    return outcomes
+
+
+def _simulate_vectorized(outcomes, parameters, sampler, n_time_steps, rng):
+    """ simulates a group of patients at once by keeping the current state of
+    every patient in a NumPy array and sampling the next states of all living patients
+    with one uniform random number per patient at each time step
+    (numbers are drawn for dead patients too, so that the k-th number of a patient is used at time step k
+    whatever happened to other patients; this keeps common random numbers synchronized across therapies) """
+
+    # current state of all patients
+    states = np.full(outcomes.popSize, parameters.initialHealthState.value)
+
+    for k in range(n_time_steps):
+
+        # indices of patients who are still alive
+        alive = np.flatnonzero(~IF_ABSORBING[states])
+        if len(alive) == 0:
+            if outcomes.statePaths is not None:
+                outcomes.statePaths[:, k:] = states[:, np.newaxis]
+            break
+
+        # sample the next states by finding where the uniform random numbers
+        # fall in the cumulative transition probabilities of the current states
+        current_states = states[alive]
+        new_states = sampler.get_next_states(current_state_indices=current_states,
+                                             rnds=sampler.get_step_uniforms(rng=rng, n=outcomes.popSize)[alive],
+                                             time_step=k)
+
+        # half-cycle corrected, discounted cost and utility of this time step
+        discount = parameters.discountFactors[k]
+        outcomes.costs[alive] += parameters.transitionCosts[current_states, new_states] * discount
+        outcomes.utilities[alive] += parameters.transitionUtilities[current_states, new_states] * discount
+
+        # survival times (corrected for half cycle effect) and number of strokes
+        if_died = IF_ABSORBING[new_states]
+        outcomes.patientSurvivalTimes[alive[if_died]] = (k + 0.5) * parameters.cycleLength
+        outcomes.nStrokes[alive] += IF_STROKE[new_states]
+
+        states[alive] = new_states
+        if outcomes.statePaths is not None:
+            outcomes.statePaths[:, k] = states
+
+
+@profiled()
+def score_state_paths(state_paths, parameters):
+    """ calculates the outcomes of patients from their recorded state paths
+    (to evaluate costs, utilities, discount rates or shorter horizons without re-simulating patients)
+    :param state_paths: (np.ndarray or np.memmap) health state of each patient at the end of each time step
+        (the number of columns is the number of time steps to calculate outcomes over)
+    :param parameters: parameters to calculate the costs and utilities with
+    :returns (CohortOutcomes) outcomes of patients (cohort outcomes are not calculated)
+    """
+
+    outcomes = CohortOutcomes(pop_size=state_paths.shape[0], cycle_length=parameters.cycleLength)
+
+    # paths are scored in blocks so that the memory used does not grow with the population size
+    # (and only one block of a memory-mapped file is read at a time)
+    for first in range(0, outcomes.popSize, BLOCK_SIZE):
+        last = min(first + BLOCK_SIZE, outcomes.popSize)
+        _score_block(state_paths=np.asarray(state_paths[first:last]),
+                     parameters=parameters,
+                     outcomes=outcomes.get_block(first=first, last=last))
+
+    return outcomes
+
+
+@profiled()
+def replay_state_paths(file_name, parameters, n_time_steps=None):
+    """ calculates the outcomes of a cohort from the state paths recorded in a file
+    :param file_name: name of the .npy file the state paths are recorded in (see Cohort)
+    :param parameters: parameters to calculate the costs and utilities with
+    :param n_time_steps: number of time steps to calculate outcomes over
+        (None to use all recorded time steps)
+    :returns (CohortOutcomes) outcomes of the cohort
+    """
+
+    state_paths = np.load(file_name, mmap_mode='r')
+    if n_time_steps is not None:
+        if n_time_steps > state_paths.shape[1]:
+            raise ValueError('Only {} time steps are recorded in {}.'.format(state_paths.shape[1], file_name))
+        state_paths = state_paths[:, :n_time_steps]
+
+    outcomes = score_state_paths(state_paths=state_paths, parameters=parameters)
+    outcomes.calculate_cohort_outcomes(initial_pop_size=outcomes.popSize, n_time_steps=state_paths.shape[1])
+    return outcomes
+
+
+def _score_block(state_paths, parameters, outcomes):
+    """ calculates the outcomes of a block of patients from their state paths """
+
+    # state of each patient at the start of each time step
+    current_states = np.empty_like(state_paths)
+    current_states[:, 0] = parameters.initialHealthState.value
+    current_states[:, 1:] = state_paths[:, :-1]
+    # patients who are already dead do not accrue outcomes
+    if_alive = ~IF_ABSORBING[current_states]
+
+    discount_factors = parameters.discountFactors[:state_paths.shape[1]] * if_alive
+    outcomes.costs[:] = np.sum(parameters.transitionCosts[current_states, state_paths] * discount_factors, axis=1)
+    outcomes.utilities[:] = np.sum(
+        parameters.transitionUtilities[current_states, state_paths] * discount_factors, axis=1)
+
+    # survival times (corrected for half cycle effect) and number of strokes
+    if_died = IF_ABSORBING[state_paths] & if_alive
+    died = np.flatnonzero(if_died.any(axis=1))
+    outcomes.patientSurvivalTimes[died] = (np.argmax(if_died[died], axis=1) + 0.5) * parameters.cycleLength
+    outcomes.nStrokes[:] = np.sum(IF_STROKE[state_paths], axis=1)
 
 
 class CohortOutcomes:
-    def __init__(self):
+    def __init__(self, pop_size=0, cycle_length=1):
+        """ outcomes of the patients of a cohort stored in preallocated arrays
+        that are indexed by the index of patients in the cohort
+        :param pop_size: population size
+        :param cycle_length: length of a simulation time step (years)
+        """
 
-        self.survivalTimes = []
-        self.nStrokes = []
+        self.popSize = pop_size
+        self.cycleLength = cycle_length
+        # survival times (years; nan if alive at the end)
+        self.patientSurvivalTimes = np.full(pop_size, np.nan, dtype=np.float32)
+        self.nStrokes = np.zeros(pop_size, dtype=np.int16)
         self.nLivingPatients = None
-        self.costs = []
-        self.utilities = []
+        self.costs = np.zeros(pop_size)
+        self.utilities = np.zeros(pop_size)
+        # health state of each patient at the end of each time step
+        # (only recorded if allocated by allocate_state_paths())
+        self.statePaths = None
+
+        # summary statistics of outcomes (deampy.statistics.SummaryStat, built when they are first used
+        # so that deampy and SciPy are only imported when the outcomes are reported)
+        self._summaryStats = None
+
+    @property
+    def survivalTimes(self):
+        """ survival times of patients who died """
+        return self.patientSurvivalTimes[~np.isnan(self.patientSurvivalTimes)]
+
+    def allocate_state_paths(self, n_time_steps, file_name=None):
+        """ allocates the store for the health states of patients (one byte per patient and time step)
+        :param n_time_steps: number of simulation time steps
+        :param file_name: name of a .npy file to memory-map the store to (None to keep it in memory)
+        """
+        if file_name is None:
+            self.statePaths = np.zeros((self.popSize, n_time_steps), dtype=np.uint8)
+        else:
+            self.statePaths = np.lib.format.open_memmap(
+                file_name, mode='w+', dtype=np.uint8, shape=(self.popSize, n_time_steps))
 
-        self.statSurvivalTime = None
-        self.statCost = None
-        self.statUtility = None
-        self.statNumStrokes = None
+    def get_block(self, first, last):
+        """
+        :param first: index of the first patient
+        :param last: index of the last patient plus 1
+        :returns (CohortOutcomes) outcomes of patients first, ..., last-1 as views into these arrays
+        """
 
-    def extract_outcome(self, simulated_patient):
+        block = CohortOutcomes(cycle_length=self.cycleLength)
+        block.popSize = last - first
+        block.patientSurvivalTimes = self.patientSurvivalTimes[first:last]
+        block.nStrokes = self.nStrokes[first:last]
+        block.costs = self.costs[first:last]
+        block.utilities = self.utilities[first:last]
+        if self.statePaths is not None:
+            block.statePaths = self.statePaths[first:last]
+        return block
+
+    def merge(self, other, first):
+        """ copies the outcomes of a block of patients
+        :param other: (CohortOutcomes) outcomes of a block of patients
+        :param first: index of the first patient of the block
+        """
 
-        if simulated_patient.stateMonitor.survivalTime is not None:
-            self.survivalTimes.append(simulated_patient.stateMonitor.survivalTime)
-        self.nStrokes.append(simulated_patient.stateMonitor.nStrokes)
-        self.costs.append(simulated_patient.stateMonitor.costUtilityMonitor.totalDiscountedCost)
-        self.utilities.append(simulated_patient.stateMonitor.costUtilityMonitor.totalDiscountedUtility)
+        last = first + other.popSize
+        self.patientSurvivalTimes[first:last] = other.patientSurvivalTimes
+        self.nStrokes[first:last] = other.nStrokes
+        self.costs[first:last] = other.costs
+        self.utilities[first:last] = other.utilities
+        if self.statePaths is not None:
+            self.statePaths[first:last] = other.statePaths
 
-    def calculate_cohort_outcomes(self, initial_pop_size):
+    @profiled()
+    def calculate_cohort_outcomes(self, initial_pop_size, n_time_steps=None):
         """ calculates the cohort outcomes
         :param initial_pop_size: initial population size
+        :param n_time_steps: number of simulation time steps (the length of the survival curve;
+            None to end the survival curve at the last death)
+        """
+        survival_times = self.survivalTimes
+
+        # summary statistics are built from the current outcomes when they are first used
+        self._summaryStats = {}
+
+        with PROFILER.phase('SurvivalCurve'):
+            if n_time_steps is None:
+                n_time_steps = int(survival_times.max() / self.cycleLength) + 1 if len(survival_times) > 0 else 0
+            self.nLivingPatients = SurvivalCurve(name='# of living patients',
+                                                 initial_size=initial_pop_size,
+                                                 n_time_steps=n_time_steps,
+                                                 cycle_length=self.cycleLength)
+            self.nLivingPatients.record_survival_times(survival_times=survival_times)
+
+    @property
+    def statSurvivalTime(self):
+        return self._get_summary_stat(name='Survival Time', data=self.survivalTimes)
+
+    @property
+    def statCost(self):
+        return self._get_summary_stat(name='Discounted cost', data=self.costs)
+
+    @property
+    def statUtility(self):
+        return self._get_summary_stat(name='Discounted utility', data=self.utilities)
+
+    @property
+    def statNumStrokes(self):
+        return self._get_summary_stat(name='Total Number of Strokes', data=self.nStrokes)
+
+    def _get_summary_stat(self, name, data):
+        """ :returns (deampy.statistics.SummaryStat) summary statistics of an outcome
+        (None if the cohort outcomes are not calculated yet) """
+
+        if self._summaryStats is None:
+            return None
+        if name not in self._summaryStats:
+            import deampy.statistics as stat
+            with PROFILER.phase('SummaryStat'):
+                self._summaryStats[name] = stat.SummaryStat(name=name, data=data)
+        return self._summaryStats[name]
+
+
+class StreamingCohortOutcomes:
+    def __init__(self, cycle_length=1):
+        """ outcomes of a cohort kept as running statistics and fixed-bin histograms
+        (memory does not grow with the population size)
+        :param cycle_length: length of a simulation time step (years)
         """
-        self.statSurvivalTime = stat.SummaryStat(
-            name='Survival Time', data=self.survivalTimes)
-        self.statCost = stat.SummaryStat(
-            name='Discounted cost', data=self.costs)
-        self.statUtility = stat.SummaryStat(
-            name='Discounted utility', data=self.utilities)
-        self.statNumStrokes = stat.SummaryStat(
-            name='Total Number of Strokes', data=self.nStrokes)
-
-        self.nLivingPatients = PrevalencePathBatchUpdate(
-            name='# of living patients',
-            initial_size=initial_pop_size,
-            times_of_changes=self.survivalTimes,
-            increments=[-1]*len(self.survivalTimes)
-        )
+
+        self.cycleLength = cycle_length
+
+        self.statSurvivalTime = RunningStat(name='Survival Time')
+        self.statCost = RunningStat(name='Discounted cost')
+        self.statUtility = RunningStat(name='Discounted utility')
+        self.statNumStrokes = RunningStat(name='Total Number of Strokes')
+
+        # survival times are (k + 0.5) * cycle length for patients who die in time step k, so the bin k
+        # of the histogram of survival times is the number of deaths in time step k
+        self.histSurvivalTime = FixedBinHistogram(name='Survival Time', bin_width=cycle_length)
+        self.histNumStrokes = FixedBinHistogram(name='Number of Strokes', bin_width=1)
+        self.nLivingPatients = None
+
+    def merge(self, other, first=0):
+        """ adds the outcomes of a block of patients to the running statistics
+        :param other: (CohortOutcomes) outcomes of a block of patients
+        :param first: not used (the order of blocks does not matter)
+        """
+
+        survival_times = other.survivalTimes
+
+        self.statSurvivalTime.record_batch(data=survival_times)
+        self.statCost.record_batch(data=other.costs)
+        self.statUtility.record_batch(data=other.utilities)
+        self.statNumStrokes.record_batch(data=other.nStrokes)
+
+        self.histSurvivalTime.record_batch(data=survival_times)
+        self.histNumStrokes.record_batch(data=other.nStrokes)
+
+    @profiled()
+    def calculate_cohort_outcomes(self, initial_pop_size, n_time_steps=None):
+        """ builds the survival curve from the number of deaths in each time step
+        :param initial_pop_size: initial population size
+        :param n_time_steps: number of simulation time steps (the length of the survival curve;
+            None to end the survival curve at the last death)
+        """
+
+        n_deaths = self.histSurvivalTime.counts
+        self.nLivingPatients = SurvivalCurve(name='# of living patients',
+                                             initial_size=initial_pop_size,
+                                             n_time_steps=len(n_deaths) if n_time_steps is None else n_time_steps,
+                                             cycle_length=self.cycleLength)
+        self.nLivingPatients.record_deaths(n_deaths=n_deaths)
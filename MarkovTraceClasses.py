@@ -0,0 +1,276 @@
+import numpy as np
+
+from InputData import HealthStates
+from OnlineStatClasses import SurvivalCurve
+from ProfilerClasses import profiled
+
+
+class DeterministicCohort:
+    def __init__(self, id, pop_size, parameters):
+        """ a cohort whose expected outcomes are calculated by propagating the
+        state-occupancy vector with the transition probability matrix (Markov trace)
+        :param id: cohort id
+        :param pop_size: population size (only used to scale the survival curve)
+        :param parameters: parameters of the selected therapy
+        """
+        self.id = id
+        self.popSize = pop_size
+        self.params = parameters
+        self.cohortOutcomes = DeterministicOutcomes()
+
+    @profiled()
+    def simulate(self, n_time_steps):
+        """ calculates the expected outcomes over the specified time steps
+        :param n_time_steps: number of simulation time steps
+        """
+
+        n_states = self.params.probMatrix.shape[0]
+
+        if_dead = np.zeros(n_states, dtype=bool)
+        if_dead[[HealthStates.STROKE_DEATH.value, HealthStates.ALL_CAUSE_DEATH.value]] = True
+
+        # proportion of the cohort in each health state at the start of each time step
+        # (row of the initial health state in the precomputed powers of the transition probability matrix)
+        occupancy = self.params.get_prob_matrix_powers()[:n_time_steps, self.params.initialHealthState.value, :]
+
+        # expected proportion of the cohort moving between each pair of states in each time step
+        # (patients who are already dead do not accrue outcomes)
+        flows = (occupancy * ~if_dead)[:, :, np.newaxis] * self.params.probMatrixSchedule[:n_time_steps]
+
+        # expected (undiscounted) cost and utility of each time step
+        costs = np.einsum('kij,ij->k', flows, self.params.transitionCosts)
+        utilities = np.einsum('kij,ij->k', flows, self.params.transitionUtilities)
+
+        deaths = flows[:, :, if_dead].sum(axis=(1, 2))  # proportion of the cohort dying in each time step
+        n_strokes = flows[:, :, HealthStates.STROKE.value].sum()
+
+        # discounted outcomes are the dot products of the outcomes of time steps with discount factors
+        discount_factors = self.params.discountFactors[:n_time_steps]
+        self.cohortOutcomes.calculate_cohort_outcomes(initial_pop_size=self.popSize,
+                                                      deaths=deaths,
+                                                      n_strokes=n_strokes,
+                                                      cost=costs @ discount_factors,
+                                                      utility=utilities @ discount_factors,
+                                                      cycle_length=self.params.cycleLength)
+
+
+@profiled()
+def get_expected_outcomes(prob_matrices, transition_costs, transition_utilities, discount_factors,
+                          initial_health_state=HealthStates.WELL):
+    """ calculates the expected discounted cost and utility per patient for many sets of parameters at once
+    (the Markov trace of DeterministicCohort with every operation broadcast over the leading axes of the inputs)
+    :param prob_matrices: transition probability matrices of each time step over a time step,
+        of shape (...) + (n_time_steps, n_states, n_states) (or (...) + (1, n_states, n_states)
+        for matrices that do not change over time)
+    :param transition_costs: cost of each transition, of shape (...) + (n_states, n_states)
+    :param transition_utilities: utility of each transition, of shape (...) + (n_states, n_states)
+    :param discount_factors: discount factor of each time step, of shape (...) + (n_time_steps, )
+    :param initial_health_state: (HealthStates) the initial health state
+    :returns (tuple of np.ndarray) expected discounted cost and utility per patient of each set of parameters
+    """
+
+    prob_matrices = np.asarray(prob_matrices, dtype=float)
+    discount_factors = np.asarray(discount_factors, dtype=float)
+    n_time_steps = discount_factors.shape[-1]
+    n_states = prob_matrices.shape[-1]
+    shape = np.broadcast_shapes(prob_matrices.shape[:-3], np.shape(transition_costs)[:-2],
+                                np.shape(transition_utilities)[:-2], discount_factors.shape[:-1])
+
+    if_alive = np.ones(n_states, dtype=bool)
+    if_alive[[HealthStates.STROKE_DEATH.value, HealthStates.ALL_CAUSE_DEATH.value]] = False
+
+    # proportion of the cohort in each health state
+    occupancy = np.zeros(shape + (n_states, ))
+    occupancy[..., initial_health_state.value] = 1
+
+    cost = np.zeros(shape)
+    utility = np.zeros(shape)
+    for k in range(n_time_steps):
+        prob_matrix = prob_matrices[..., min(k, prob_matrices.shape[-3] - 1), :, :]
+
+        # expected proportion of the cohort moving between each pair of states
+        # (patients who are already dead do not accrue outcomes)
+        flows = (occupancy * if_alive)[..., :, np.newaxis] * prob_matrix
+        cost += np.sum(flows * transition_costs, axis=(-2, -1)) * discount_factors[..., k]
+        utility += np.sum(flows * transition_utilities, axis=(-2, -1)) * discount_factors[..., k]
+
+        occupancy = np.matmul(occupancy[..., np.newaxis, :], prob_matrix)[..., 0, :]
+
+    return cost, utility
+
+
+class DeterministicOutcomes:
+    def __init__(self):
+
+        # to mirror CohortOutcomes, the observations are the expected outcomes of a patient
+        self.survivalTimes = []
+        self.nStrokes = []
+        self.nLivingPatients = None
+        self.costs = []
+        self.utilities = []
+
+        self.statSurvivalTime = None
+        self.statCost = None
+        self.statUtility = None
+        self.statNumStrokes = None
+
+    def calculate_cohort_outcomes(self, initial_pop_size, deaths, n_strokes, cost, utility, cycle_length=1):
+        """ calculates the cohort outcomes
+        :param initial_pop_size: initial population size
+        :param deaths: proportion of the cohort dying in each time step
+        :param n_strokes: expected number of strokes per patient
+        :param cost: expected discounted cost per patient
+        :param utility: expected discounted utility per patient
+        :param cycle_length: length of a time step (years)
+        """
+
+        # survival time of those who die is (k + 0.5) * cycle length if they die in time step k
+        death_times = (np.arange(len(deaths)) + 0.5) * cycle_length
+        mean_survival_time = np.sum(death_times * deaths) / np.sum(deaths)
+
+        self.survivalTimes = [mean_survival_time]
+        self.nStrokes = [n_strokes]
+        self.costs = [cost]
+        self.utilities = [utility]
+
+        self.statSurvivalTime = PointEstimate(name='Survival Time', value=mean_survival_time)
+        self.statCost = PointEstimate(name='Discounted cost', value=cost)
+        self.statUtility = PointEstimate(name='Discounted utility', value=utility)
+        self.statNumStrokes = PointEstimate(name='Total Number of Strokes', value=n_strokes)
+
+        # expected number of living patients
+        self.nLivingPatients = SurvivalCurve(name='# of living patients',
+                                             initial_size=initial_pop_size,
+                                             n_time_steps=len(deaths),
+                                             cycle_length=cycle_length,
+                                             dtype=float)
+        self.nLivingPatients.record_deaths(n_deaths=deaths * initial_pop_size)
+
+
+class AggregatedCohort:
+    def __init__(self, id, pop_size, parameters):
+        """ a cohort simulated by tracking the number of patients in each health state
+        (since patients of a cohort are exchangeable, the numbers moving out of each state
+        in a time step follow a multinomial distribution)
+        :param id: cohort id (seed of the random number generator)
+        :param pop_size: population size
+        :param parameters: parameters of the selected therapy
+        """
+        self.id = id
+        self.popSize = pop_size
+        self.params = parameters
+        self.cohortOutcomes = AggregatedOutcomes()
+
+    @profiled()
+    def simulate(self, n_time_steps):
+        """ simulates the cohort over the specified time steps
+        (the time does not depend on the population size)
+        :param n_time_steps: number of simulation time steps
+        """
+
+        # random number generator
+        rng = np.random.RandomState(seed=self.id)
+
+        n_states = self.params.probMatrix.shape[0]
+
+        if_dead = np.zeros(n_states, dtype=bool)
+        if_dead[[HealthStates.STROKE_DEATH.value, HealthStates.ALL_CAUSE_DEATH.value]] = True
+        alive_states = np.flatnonzero(~if_dead)
+
+        # number of patients in each health state
+        counts = np.zeros(n_states, dtype=np.int64)
+        counts[self.params.initialHealthState.value] = self.popSize
+
+        n_deaths = np.zeros(n_time_steps, dtype=np.int64)   # number of deaths in each time step
+        n_strokes = 0
+        costs = np.zeros(n_time_steps)  # total (undiscounted) cost of each time step
+        utilities = np.zeros(n_time_steps)  # total (undiscounted) utility of each time step
+
+        for k in range(n_time_steps):
+
+            # number of patients moving between each pair of states
+            # (patients who are already dead do not accrue outcomes)
+            flows = np.zeros((n_states, n_states), dtype=np.int64)
+            for i in alive_states:
+                if counts[i] > 0:
+                    flows[i] = rng.multinomial(counts[i], self.params.probMatrixSchedule[k, i])
+
+            costs[k] = np.sum(flows * self.params.transitionCosts)
+            utilities[k] = np.sum(flows * self.params.transitionUtilities)
+
+            n_deaths[k] = flows[:, if_dead].sum()
+            n_strokes += flows[:, HealthStates.STROKE.value].sum()
+
+            counts = flows.sum(axis=0) + counts * if_dead
+
+        discount_factors = self.params.discountFactors[:n_time_steps]
+        self.cohortOutcomes.calculate_cohort_outcomes(initial_pop_size=self.popSize,
+                                                      n_deaths=n_deaths,
+                                                      n_strokes=n_strokes,
+                                                      total_cost=costs @ discount_factors,
+                                                      total_utility=utilities @ discount_factors,
+                                                      cycle_length=self.params.cycleLength)
+
+
+class AggregatedOutcomes:
+    def __init__(self):
+
+        self.nDeaths = None     # number of deaths in each time step
+        self.nLivingPatients = None
+        self.totalStrokes = None
+        self.totalCost = None
+        self.totalUtility = None
+
+        # outcomes per patient
+        self.meanSurvivalTime = None    # (of patients who died)
+        self.meanCost = None
+        self.meanUtility = None
+        self.meanNumStrokes = None
+
+    def calculate_cohort_outcomes(self, initial_pop_size, n_deaths, n_strokes, total_cost, total_utility,
+                                  cycle_length=1):
+        """ calculates the cohort outcomes
+        :param initial_pop_size: initial population size
+        :param n_deaths: number of deaths in each time step
+        :param n_strokes: total number of strokes
+        :param total_cost: total discounted cost of the cohort
+        :param total_utility: total discounted utility of the cohort
+        :param cycle_length: length of a time step (years)
+        """
+
+        self.nDeaths = n_deaths
+        self.totalStrokes = int(n_strokes)
+        self.totalCost = total_cost
+        self.totalUtility = total_utility
+
+        # survival time of those who die is (k + 0.5) * cycle length if they die in time step k
+        death_times = (np.arange(len(n_deaths)) + 0.5) * cycle_length
+        self.meanSurvivalTime = np.sum(death_times * n_deaths) / np.sum(n_deaths)
+        self.meanCost = total_cost / initial_pop_size
+        self.meanUtility = total_utility / initial_pop_size
+        self.meanNumStrokes = n_strokes / initial_pop_size
+
+        self.nLivingPatients = SurvivalCurve(name='# of living patients',
+                                             initial_size=initial_pop_size,
+                                             n_time_steps=len(n_deaths),
+                                             cycle_length=cycle_length)
+        self.nLivingPatients.record_deaths(n_deaths=n_deaths)
+
+
+class PointEstimate:
+    def __init__(self, name, value):
+        """ an outcome that is calculated exactly (it has no confidence interval)
+        :param name: name of the outcome
+        :param value: value of the outcome
+        """
+        self.name = name
+        self.value = value
+
+    def get_mean(self):
+        return self.value
+
+    def get_formatted_mean_and_interval(self, interval_type='c', alpha=0.05, deci=None, form=None):
+        """ :returns (string) the formatted value (interval_type and alpha are ignored
+        because exact outcomes have no confidence interval) """
+        import deampy.format_functions as F
+        return F.format_number(number=self.value, deci=deci, format=form)
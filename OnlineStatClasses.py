@@ -0,0 +1,177 @@
+from statistics import NormalDist
+
+import numpy as np
+
+
+class RunningStat:
+    def __init__(self, name=None):
+        """ mean and variance of a stream of observations updated in batches
+        (Welford's algorithm with Chan's formula to combine batches) without storing the observations
+        :param name: name of this statistics
+        """
+        self.name = name
+        self.n = 0
+        self.mean = 0
+        self._sumSquaredDeviations = 0
+
+    def record_batch(self, data):
+        """ updates the statistics with a batch of observations
+        :param data: (list or np.ndarray) observations
+        """
+
+        data = np.asarray(data, dtype=float)
+        if len(data) == 0:
+            return
+
+        batch_mean = data.mean()
+        self.merge_moments(n=len(data),
+                           mean=batch_mean,
+                           sum_squared_deviations=np.sum((data - batch_mean) ** 2))
+
+    def merge(self, other):
+        """ combines the observations of another RunningStat with the observations of this one
+        :param other: (RunningStat) statistics of other observations
+        """
+        self.merge_moments(n=other.n, mean=other.mean, sum_squared_deviations=other._sumSquaredDeviations)
+
+    def merge_moments(self, n, mean, sum_squared_deviations):
+        """ combines the moments of a group of observations with the moments of this statistics
+        :param n: number of observations
+        :param mean: mean of observations
+        :param sum_squared_deviations: sum of squared deviations of observations from their mean
+        """
+
+        if n == 0:
+            return
+
+        total_n = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total_n
+        self._sumSquaredDeviations += sum_squared_deviations + delta ** 2 * self.n * n / total_n
+        self.n = total_n
+
+    def get_mean(self):
+        return self.mean
+
+    def get_stdev(self):
+        if self.n < 2:
+            return np.nan
+        return np.sqrt(self._sumSquaredDeviations / (self.n - 1))
+
+    def get_half_width(self, alpha=0.05):
+        """ :returns half-width of the confidence interval of the mean
+        (normal approximation which is accurate for the large number of observations
+        this class is meant for) """
+        if self.n < 2:
+            return np.nan
+        return NormalDist().inv_cdf(1 - alpha / 2) * self.get_stdev() / np.sqrt(self.n)
+
+    def get_interval(self, interval_type='c', alpha=0.05):
+        """ :returns confidence interval of the mean (interval_type should be 'c') """
+
+        if interval_type != 'c':
+            raise ValueError('Only confidence intervals (interval_type=\'c\') are available '
+                             'when observations are not stored.')
+
+        half_width = self.get_half_width(alpha=alpha)
+        return [self.mean - half_width, self.mean + half_width]
+
+    def get_formatted_mean_and_interval(self, interval_type='c', alpha=0.05, deci=None, form=None):
+        """ :returns (string) mean and confidence interval formatted as specified """
+        import deampy.format_functions as F
+        return F.format_estimate_interval(estimate=self.get_mean(),
+                                          interval=self.get_interval(interval_type=interval_type, alpha=alpha),
+                                          deci=deci,
+                                          format=form)
+
+
+class FixedBinHistogram:
+    def __init__(self, name, bin_width):
+        """ counts of observations in bins [0, w), [w, 2w), ... of fixed width
+        (bins are added up to the largest observation, so memory does not grow with
+        the number of observations)
+        :param name: name of this histogram
+        :param bin_width: width of bins
+        """
+        self.name = name
+        self.binWidth = bin_width
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def record_batch(self, data):
+        """ adds a batch of observations to the histogram
+        :param data: (np.ndarray) non-negative observations
+        """
+        self._add_counts(np.bincount((np.asarray(data) / self.binWidth).astype(int)))
+
+    def merge(self, other):
+        """ adds the counts of another histogram with the same bin width to this histogram """
+        self._add_counts(other.counts)
+
+    def get_bin_edges(self):
+        return np.arange(len(self.counts) + 1) * self.binWidth
+
+    def _add_counts(self, counts):
+        if len(counts) > len(self.counts):
+            self.counts = np.pad(self.counts, (0, len(counts) - len(self.counts)))
+        self.counts[:len(counts)] += counts
+
+
+class SurvivalCurve:
+    def __init__(self, name, initial_size, n_time_steps, cycle_length=1, dtype=np.int64):
+        """ number of living patients over time stored as the number of deaths in each time step
+        (patients who die in time step k die at time (k + 0.5) * cycle length, so the curve is a fixed-length array
+        of counts that is built with np.bincount and combined across blocks of patients by adding counts;
+        it has the times and values of a deampy PrevalenceSamplePath, see SupportMarkovModel.get_sample_path())
+        :param name: name of this survival curve
+        :param initial_size: number of living patients at time 0
+        :param n_time_steps: number of simulation time steps
+        :param cycle_length: length of a time step (years)
+        :param dtype: type of the counts (float for expected numbers of deaths)
+        """
+        self.name = name
+        self.initialSize = initial_size
+        self.cycleLength = cycle_length
+        self.nDeaths = np.zeros(n_time_steps, dtype=dtype)   # number of deaths in each time step
+
+    def record_survival_times(self, survival_times):
+        """ adds the deaths of patients with the given survival times
+        :param survival_times: (np.ndarray) survival times ((k + 0.5) * cycle length for patients who die
+            in time step k)
+        """
+        counts = np.bincount((np.asarray(survival_times) / self.cycleLength).astype(int), minlength=len(self.nDeaths))
+        if len(counts) > len(self.nDeaths):
+            raise ValueError('{} | Survival times should be less than {} time steps.'
+                             .format(self.name, len(self.nDeaths)))
+        self.nDeaths += counts.astype(self.nDeaths.dtype)
+
+    def record_deaths(self, n_deaths):
+        """ adds the number of deaths in each time step
+        :param n_deaths: (np.ndarray) number of deaths in time steps 0, 1, ... (at most n_time_steps values)
+        """
+        self.nDeaths[:len(n_deaths)] += n_deaths
+
+    def merge(self, other):
+        """ adds the patients of another survival curve over the same time steps to this curve
+        (to combine the curves of blocks of patients)
+        :param other: (SurvivalCurve) survival curve of other patients
+        """
+        if len(other.nDeaths) != len(self.nDeaths) or other.cycleLength != self.cycleLength:
+            raise ValueError('{} | Survival curves should have the same time steps.'.format(self.name))
+        self.initialSize += other.initialSize
+        self.nDeaths += other.nDeaths
+
+    def get_n_living(self):
+        """ :returns (np.ndarray) number of living patients at the end of each time step """
+        return self.initialSize - np.cumsum(self.nDeaths)
+
+    def get_times(self):
+        """ :returns (np.ndarray) time 0 and the times at which patients died """
+        return np.concatenate(([0], (np.flatnonzero(self.nDeaths) + 0.5) * self.cycleLength))
+
+    def get_values(self, delete_initial_zeroes=False):
+        """ :returns (np.ndarray) number of living patients at the times returned by get_times() """
+        n_living = self.get_n_living()
+        return np.concatenate(([self.initialSize], n_living[self.nDeaths != 0]))
+
+    def get_current_value(self):
+        return self.get_n_living()[-1] if len(self.nDeaths) > 0 else self.initialSize
@@ -0,0 +1,124 @@
+import numpy as np
+
+import InputData as D
+import MarkovClasses as Cls
+import ParameterClasses as P
+from InputData import HealthStates
+from ProfilerClasses import profiled
+
+
+class PSA:
+    def __init__(self, n_draws, pop_size, distributions=D.PSA_DISTRIBUTIONS, seed=D.PSA_SEED):
+        """ probabilistic sensitivity analysis
+        :param n_draws: number of parameter draws
+        :param pop_size: cohort population size for each parameter draw
+        :param distributions: (dictionary) distributions of inputs (see InputData.PSA_DISTRIBUTIONS)
+        :param seed: seed of the random number generator to sample parameters
+        """
+        self.nDraws = n_draws
+        self.popSize = pop_size
+        self.distributions = distributions
+        self.seed = seed
+
+        self.inputs = None      # (dictionary) sampled values of each input
+        self.cohortsNone = []   # cohorts simulated under no therapy (one per parameter draw)
+        self.cohortsAnticoag = []   # cohorts simulated under anticoagulation (one per parameter draw)
+
+        # mean cost and utility of each parameter draw (paired across the two therapies)
+        self.outcomesNone = None
+        self.outcomesAnticoag = None
+
+    @profiled()
+    def simulate(self, n_time_steps, engine=Cls.Engines.VECTORIZED, n_workers=1):
+        """ samples the inputs and simulates a cohort under each therapy for each parameter draw
+        :param n_time_steps: number of simulation time steps
+        :param engine: (Engines) the engine to simulate the patients with
+        :param n_workers: number of processes (1 to simulate in this process, None to use all cores)
+        """
+
+        self.inputs = sample_inputs(n_draws=self.nDraws,
+                                    distributions=self.distributions,
+                                    rng=np.random.RandomState(seed=self.seed))
+
+        # transition probability matrices of all draws, shape (n_draws, 5, 5)
+        # (or (n_draws, n_time_steps, 5, 5) if transition probabilities change over time)
+        prob_matrices = {}
+        for therapy in P.Therapies:
+            prob_matrices[therapy] = P.get_prob_matrix_schedule(
+                therapy=therapy,
+                n_time_steps=n_time_steps,
+                p_mortality=self.inputs['P_MORTALITY'],
+                p_stroke=self.inputs['P_STROKE'],
+                p_re_stroke=self.inputs['P_RE_STROKE'],
+                p_surv=self.inputs['P_SURV'],
+                anticoag_rr=self.inputs['ANTICOAG_RR'])
+
+        # annual state costs and utilities of all draws, shape (n_draws, 5)
+        annual_state_costs = np.tile(D.ANNUAL_STATE_COST, (self.nDraws, 1)).astype(float)
+        annual_state_costs[:, HealthStates.POST_STROKE.value] = self.inputs['COST_POST_STROKE']
+        annual_state_costs[:, HealthStates.STROKE.value] = self.inputs['COST_STROKE']
+        annual_state_utilities = np.tile(D.ANNUAL_STATE_UTILITY, (self.nDraws, 1)).astype(float)
+        annual_state_utilities[:, HealthStates.POST_STROKE.value] = self.inputs['UTILITY_POST_STROKE']
+        # an acute stroke lasts STROKE_DURATION and the rest of the year is spent in Post-Stroke
+        annual_state_utilities[:, HealthStates.STROKE.value] = \
+            D.STROKE_UTILITY * D.STROKE_DURATION + self.inputs['UTILITY_POST_STROKE'] * (1 - D.STROKE_DURATION)
+
+        # the two cohorts of a draw use the same id so that they share random numbers
+        self.cohortsNone = []
+        self.cohortsAnticoag = []
+        for d in range(self.nDraws):
+            for therapy, cohorts in ((P.Therapies.NONE, self.cohortsNone),
+                                     (P.Therapies.ANTICOAG, self.cohortsAnticoag)):
+                params = P.Parameters(therapy=therapy,
+                                      prob_matrix=prob_matrices[therapy][d],
+                                      annual_state_costs=annual_state_costs[d],
+                                      annual_state_utilities=annual_state_utilities[d],
+                                      anticoag_cost=self.inputs['ANTICOAG_COST'][d],
+                                      n_time_steps=n_time_steps)
+                cohorts.append(Cls.Cohort(id=d, pop_size=self.popSize, parameters=params))
+
+        # simulate all cohorts
+        Cls.simulate_cohorts(cohorts=self.cohortsNone + self.cohortsAnticoag,
+                             n_time_steps=n_time_steps,
+                             engine=engine,
+                             n_workers=n_workers)
+
+        self.outcomesNone = PSAOutcomes(cohorts=self.cohortsNone)
+        self.outcomesAnticoag = PSAOutcomes(cohorts=self.cohortsAnticoag)
+
+
+class PSAOutcomes:
+    def __init__(self, cohorts):
+        """ mean outcomes of the cohorts simulated for each parameter draw
+        (costs and utilities can be passed to econ.CEA and econ.CBA with if_paired=True)
+        :param cohorts: (list) simulated cohorts (one per parameter draw)
+        """
+
+        self.costs = np.array([np.mean(c.cohortOutcomes.costs) for c in cohorts])
+        self.utilities = np.array([np.mean(c.cohortOutcomes.utilities) for c in cohorts])
+
+
+def sample_inputs(n_draws, distributions, rng):
+    """ samples the inputs from their distributions
+    :param n_draws: number of parameter draws
+    :param distributions: (dictionary) name: (distribution, mean, standard deviation)
+    :param rng: random number generator
+    :returns (dictionary) name: (np.ndarray) sampled values
+    """
+
+    inputs = {}
+    for name, (dist, mean, st_dev) in distributions.items():
+        var = st_dev ** 2
+        if dist == 'beta':
+            # method of moments
+            a_plus_b = mean * (1 - mean) / var - 1
+            inputs[name] = rng.beta(a=mean * a_plus_b, b=(1 - mean) * a_plus_b, size=n_draws)
+        elif dist == 'gamma':
+            inputs[name] = rng.gamma(shape=mean ** 2 / var, scale=var / mean, size=n_draws)
+        elif dist == 'lognormal':
+            sigma2 = np.log(1 + var / mean ** 2)
+            inputs[name] = rng.lognormal(mean=np.log(mean) - sigma2 / 2, sigma=np.sqrt(sigma2), size=n_draws)
+        else:
+            raise ValueError('Invalid distribution {} for input {}.'.format(dist, name))
+
+    return inputs
@@ -1,6 +1,12 @@
-import copy
+from enum import Enum
+from functools import lru_cache
 
-from InputData import *
+import numpy as np
+
+from InputData import (AGE_AT_START, ANNUAL_STATE_COST, ANNUAL_STATE_UTILITY, ANTICOAG_COST,
+                       ANTICOAG_EFFECT_DURATION, ANTICOAG_RR, ANTICOAG_WANING_PERIOD, CYCLE_LENGTH, DISCOUNT,
+                       IF_AGE_DEPENDENT_MORTALITY, LIFE_TABLE, P_MORTALITY, P_RE_STROKE, P_STROKE, P_SURV,
+                       SIM_TIME_STEPS, STROKE_DURATION, HealthStates)
 
 
 class Therapies(Enum):
@@ -10,7 +16,27 @@ class Therapies(Enum):
 
 
 class Parameters:
-    def __init__(self, therapy):
+    def __init__(self, therapy, prob_matrix=None,
+                 annual_state_costs=ANNUAL_STATE_COST,
+                 annual_state_utilities=ANNUAL_STATE_UTILITY,
+                 anticoag_cost=ANTICOAG_COST,
+                 discount_rate=DISCOUNT,
+                 n_time_steps=SIM_TIME_STEPS,
+                 cycle_length=CYCLE_LENGTH):
+        """ parameters of a therapy (all arrays are read-only so that parameters can be shared
+        by cohorts, threads and processes; use get_parameters() to reuse parameters built before)
+        :param therapy: (Therapies) the selected therapy
+        :param prob_matrix: annual transition probability matrix of the selected therapy, or a schedule of
+            annual transition probability matrices of shape (n_time_steps, n_states, n_states) that gives
+            the matrix of each time step (if not provided, it is calculated from the values in InputData
+            with get_prob_matrix_schedule())
+        :param annual_state_costs: annual cost of each health state (without the cost of therapy)
+        :param annual_state_utilities: annual utility of each health state
+        :param anticoag_cost: annual cost of anticoagulation
+        :param discount_rate: annual discount rate
+        :param n_time_steps: number of simulation time steps to precompute discount factors for
+        :param cycle_length: length of a simulation time step (years)
+        """
 
         # selected therapy
         self.therapy = therapy
@@ -18,109 +44,346 @@ class Parameters:
         # initial health state
         self.initialHealthState = HealthStates.WELL
 
-        # transition probability matrix of the selected therapy
-        self.probMatrix = []
+        # length of a time step (years)
+        self.cycleLength = cycle_length
+        self.nTimeSteps = n_time_steps
+
+        # transition probability matrices of the selected therapy over a time step
+        if prob_matrix is None:
+            prob_matrix = get_prob_matrix_schedule(therapy=therapy,
+                                                   n_time_steps=n_time_steps,
+                                                   cycle_length=cycle_length)
+        prob_matrices = get_cycle_prob_matrix(annual_prob_matrix=prob_matrix, cycle_length=cycle_length)
+        if prob_matrices.ndim == 3:
+            if len(prob_matrices) < n_time_steps:
+                raise ValueError('The schedule of transition probability matrices should have at least {} '
+                                 'time steps.'.format(n_time_steps))
+            prob_matrices = prob_matrices[:n_time_steps]
+        # set to True if the transition probabilities change over time
+        # (patients can then not be simulated with the event-driven engine)
+        self.ifTimeVarying = prob_matrices.ndim == 3 and bool(np.any(prob_matrices != prob_matrices[:1]))
 
-        # calculate transition probabilities depending on which therapy options is in use
-        if therapy == Therapies.NONE:
-            self.probMatrix = get_prob_matrix_no_anticoag()
+        # transition probability matrix (of the first time step if it changes over time)
+        self.probMatrix = _read_only(prob_matrices if prob_matrices.ndim == 2 else prob_matrices[0])
+        # transition probability matrix of each time step, shape (n_time_steps, n_states, n_states)
+        # (a read-only view of probMatrix if the transition probabilities do not change over time)
+        if self.ifTimeVarying:
+            self.probMatrixSchedule = _read_only(prob_matrices)
         else:
-            self.probMatrix = get_prob_matrix_anticoag(
-                prob_matrix_no_anticoag=get_prob_matrix_no_anticoag())
+            self.probMatrixSchedule = np.broadcast_to(self.probMatrix, (n_time_steps, ) + self.probMatrix.shape)
+        self._probMatrixPowers = None
 
-        self.annualStateCosts = ANNUAL_STATE_COST
-        self.annualStateUtilities = ANNUAL_STATE_UTILITY
+        # annual state costs with the annual cost of anticoagulation
+        self.annualStateCosts = _read_only(get_annual_state_costs(therapy=therapy,
+                                                                  annual_state_costs=annual_state_costs,
+                                                                  anticoag_cost=anticoag_cost))
+        self.annualStateUtilities = _read_only(annual_state_utilities)
 
-        # adding annual cost of anticoagulation
-        if self.therapy == Therapies.ANTICOAG:
-            self.annualStateCosts[HealthStates.POST_STROKE.value] += ANTICOAG_COST
+        # cost and utility of each health state over a time step
+        self.stateCosts = _read_only(get_cycle_state_costs(annual_state_costs=self.annualStateCosts,
+                                                           cycle_length=cycle_length))
+        self.stateUtilities = _read_only(get_cycle_state_utilities(
+            annual_state_utilities=self.annualStateUtilities, cycle_length=cycle_length))
 
         # discount rate
-        self.discountRate = DISCOUNT
-
-
-def get_prob_matrix_no_anticoag():
-
-    # transition probability matrix with temporary state Stroke
-    matrix =[
-        [  # Well
-            (1 - P_MORTALITY) * (1 - P_STROKE),  # Well
-            0,  # Post-stroke
-            0,  # Stroke-death
-            P_MORTALITY,  # All-cause mortality
-            (1 - P_MORTALITY) * P_STROKE],  # Stroke
-
-        [  # POST_STROKE
-            0,  # Well
-            (1 - P_MORTALITY) * (1 - P_RE_STROKE),  # Post-stroke
-            0,  # Stroke-death
-            P_MORTALITY,  # All-cause mortality
-            (1 - P_MORTALITY) * P_RE_STROKE],  # Stroke
-
-        [  # STOKE DEATH
-            0,  # Well
-            0,  # Post-stroke
-            1,  # Stroke-death
-            0,  # All-cause mortality
-            0],  # Stroke
-
-        [  # ALL_CAUSE DEATH
-            0,  # Well
-            0,  # Post-stroke
-            0,  # Stroke-death
-            1,  # All-cause mortality
-            0],  # Stroke
-        [  # STOKE
-            0,  # Well
-            P_SURV,  # Post-stroke
-            1 - P_SURV,  # Stroke-death
-            0,  # All-cause mortality
-            0],  # Stroke
-    ]
-
-    return matrix
-
-
-def get_prob_matrix_anticoag(prob_matrix_no_anticoag):
+        self.discountRate = discount_rate
+
+        # discount factor of each time step
+        self.discountFactors = _read_only(get_discount_factors(discount_rate=discount_rate,
+                                                               n_time_steps=n_time_steps,
+                                                               cycle_length=cycle_length))
+        # ratio of the discount factors of two consecutive time steps
+        self.discountRatio = (1 + self.discountRate * cycle_length/2) ** -2
+
+        # cost and utility of each transition (i -> j) corrected for half cycle effect
+        self.transitionCosts = _read_only(get_transition_payoffs(state_payoffs=self.stateCosts))
+        self.transitionUtilities = _read_only(get_transition_payoffs(state_payoffs=self.stateUtilities))
+
+    def get_discount_sum(self, time_step, n_time_steps):
+        """
+        :param time_step: the first time step
+        :param n_time_steps: number of consecutive time steps
+        :returns the sum of the discount factors of n_time_steps time steps starting at time_step
+            (calculated in closed form as the sum of a geometric series)
+        """
+
+        if self.discountRatio == 1:
+            return n_time_steps * self.discountFactors[time_step]
+        return self.discountFactors[time_step] * (1 - self.discountRatio ** n_time_steps) / (1 - self.discountRatio)
+
+    def get_prob_matrix_powers(self):
+        """ :returns (np.ndarray) read-only products I, P_0, P_0 P_1, ..., P_0 P_1 ... P_(n_time_steps-2) of the
+        transition probability matrices P_k of time steps (the powers P^0, P^1, ... of the transition probability
+        matrix if it does not change over time), of shape (n_time_steps, n_states, n_states)
+        (row i of product k is the distribution of the health state after k time steps starting from state i;
+        calculated when first requested) """
+
+        if self._probMatrixPowers is None:
+            powers = np.empty((self.nTimeSteps, ) + self.probMatrix.shape)
+            if self.nTimeSteps > 0:
+                powers[0] = np.identity(len(self.probMatrix))
+            for k in range(1, self.nTimeSteps):
+                np.matmul(powers[k - 1], self.probMatrixSchedule[k - 1], out=powers[k])
+            self._probMatrixPowers = _read_only(powers)
+        return self._probMatrixPowers
+
+
+@lru_cache(maxsize=None)
+def get_parameters(therapy,
+                   p_mortality=P_MORTALITY, p_stroke=P_STROKE, p_re_stroke=P_RE_STROKE, p_surv=P_SURV,
+                   anticoag_rr=ANTICOAG_RR, anticoag_cost=ANTICOAG_COST,
+                   discount_rate=DISCOUNT, n_time_steps=SIM_TIME_STEPS, cycle_length=CYCLE_LENGTH):
+    """ returns the parameters of a therapy for the given inputs
+    (parameters are built once for each combination of inputs and then reused)
+    :param therapy: (Therapies) the selected therapy
+    :param p_mortality: annual probability of death due to all causes
+    :param p_stroke: annual probability of stroke in state Well
+    :param p_re_stroke: annual probability of recurrent stroke
+    :param p_surv: probability of surviving a stroke
+    :param anticoag_rr: anticoagulation relative risk of recurrent stroke
+    :param anticoag_cost: annual cost of anticoagulation
+    :param discount_rate: annual discount rate
+    :param n_time_steps: number of simulation time steps to precompute discount factors for
+    :param cycle_length: length of a simulation time step (years)
+    :returns (Parameters) read-only parameters
+    """
+
+    return Parameters(therapy=therapy,
+                      prob_matrix=get_prob_matrix_schedule(therapy=therapy,
+                                                           n_time_steps=n_time_steps,
+                                                           cycle_length=cycle_length,
+                                                           p_mortality=p_mortality,
+                                                           p_stroke=p_stroke,
+                                                           p_re_stroke=p_re_stroke,
+                                                           p_surv=p_surv,
+                                                           anticoag_rr=anticoag_rr),
+                      anticoag_cost=anticoag_cost,
+                      discount_rate=discount_rate,
+                      n_time_steps=n_time_steps,
+                      cycle_length=cycle_length)
+
+
+def get_prob_matrix_schedule(therapy, n_time_steps, cycle_length=CYCLE_LENGTH,
+                             p_mortality=P_MORTALITY, p_stroke=P_STROKE, p_re_stroke=P_RE_STROKE, p_surv=P_SURV,
+                             anticoag_rr=ANTICOAG_RR,
+                             life_table=LIFE_TABLE if IF_AGE_DEPENDENT_MORTALITY else None,
+                             age_at_start=AGE_AT_START,
+                             anticoag_effect_duration=ANTICOAG_EFFECT_DURATION,
+                             anticoag_waning_period=ANTICOAG_WANING_PERIOD):
+    """ builds the annual transition probability matrix of each time step
+    (inputs can be numbers or NumPy arrays of the same shape as in get_prob_matrices())
+    :param therapy: (Therapies) the selected therapy
+    :param n_time_steps: number of simulation time steps
+    :param cycle_length: length of a time step (years)
+    :param p_mortality: annual probability of death due to all causes (not used if life_table is provided)
+    :param p_stroke: annual probability of stroke in state Well
+    :param p_re_stroke: annual probability of recurrent stroke
+    :param p_surv: probability of surviving a stroke
+    :param anticoag_rr: anticoagulation relative risk of recurrent stroke
+    :param life_table: (list of (age, probability)) annual probability of death due to all causes from each age on
+        (None to use p_mortality at all ages)
+    :param age_at_start: age of patients at the start of simulation
+    :param anticoag_effect_duration: years the relative risk of anticoagulation is anticoag_rr before it starts
+        to return to 1 (None for an effect that does not wane)
+    :param anticoag_waning_period: years over which the relative risk returns to 1 linearly
+    :returns (np.ndarray) transition probability matrices of shape (shape of inputs) + (n_time_steps, 5, 5),
+        or of shape (shape of inputs) + (5, 5) if the transition probabilities do not change over time
+    """
+
+    if life_table is None and anticoag_effect_duration is None:
+        return get_prob_matrices(therapy=therapy, p_mortality=p_mortality, p_stroke=p_stroke,
+                                 p_re_stroke=p_re_stroke, p_surv=p_surv, anticoag_rr=anticoag_rr)
+
+    # time at the start of each time step (years)
+    times = np.arange(n_time_steps) * cycle_length
+
+    # inputs of each time step have shape (shape of inputs) + (n_time_steps, )
+    p_mortality, p_stroke, p_re_stroke, p_surv, anticoag_rr = (
+        np.asarray(value, dtype=float)[..., np.newaxis]
+        for value in (p_mortality, p_stroke, p_re_stroke, p_surv, anticoag_rr))
+
+    # background mortality is looked up from the life table by the age at the start of each time step
+    if life_table is not None:
+        ages, probabilities = np.array(life_table, dtype=float).T
+        rows = np.searchsorted(ages, age_at_start + times, side='right') - 1
+        p_mortality = probabilities[np.maximum(rows, 0)]
+
+    # the effect of anticoagulation (1 - relative risk) decreases linearly to 0 after it starts to wane
+    if anticoag_effect_duration is not None:
+        time_waning = np.maximum(times - anticoag_effect_duration, 0)
+        if anticoag_waning_period > 0:
+            effect = np.clip(1 - time_waning / anticoag_waning_period, 0, 1)
+        else:
+            effect = (times < anticoag_effect_duration).astype(float)
+        anticoag_rr = 1 - (1 - anticoag_rr) * effect
+
+    return get_prob_matrices(therapy=therapy, p_mortality=p_mortality, p_stroke=p_stroke,
+                             p_re_stroke=p_re_stroke, p_surv=p_surv, anticoag_rr=anticoag_rr)
+
+
+def get_cycle_prob_matrix(annual_prob_matrix, cycle_length):
+    """ converts annual transition probabilities to probabilities over a time step of cycle_length years
+    (the probability p of leaving a state is converted through its rate, -ln(1-p) per year, and split among
+    the states patients move to in the same proportions as in the annual matrix; rows of absorbing states
+    and of temporary states that patients always leave within a time step, i.e. Stroke, are not changed)
+    :param annual_prob_matrix: annual transition probability matrices of shape (...) + (n_states, n_states)
+    :param cycle_length: length of a time step (years)
+    :returns (np.ndarray) transition probability matrices over a time step
     """
-    :param prob_matrix_no_anticoag: (list of lists) transition probability matrix under no anticoagolation
-    :returns (list of lists) transition probability matrix under anticoagolation """
 
-    # There are two ways to build the probability matrix under anti-coagulation:
-    # 1. to get the probability matrix under no anti-coagulation and modify the row that corresponds to 'Post-Stroke',
-    # 2. build the matrix from scratch (similar to what we did in get_prob_matrix_no_anticoag() method).
-    # Here we use the first approach.
+    matrices = np.array(annual_prob_matrix, dtype=float)
+    if cycle_length == 1:
+        return matrices
+
+    # probability of staying in each state over a time step: p_stay ** cycle_length
+    p_stay = np.diagonal(matrices, axis1=-2, axis2=-1)
+    if_converted = (p_stay > 0) & (p_stay < 1)
+    cycle_p_stay = np.where(if_converted, p_stay ** cycle_length, p_stay)
 
-    # copy all the elements of probability matrix under no anti-coagulation to a
-    # new matrix. Note that we have to 'deepcopy' the elements of prob_matrix_no_anticoag
-    # to prob_matrix. Otherwise, any change we make to prob_matrix will also change
-    # prob_matrix_no_anticoag (see HW 1, Problem 4 for an example).
-    prob_matrix = copy.deepcopy(prob_matrix_no_anticoag)
+    # probabilities of moving to other states are scaled by the change in the probability of leaving
+    scale = np.ones_like(p_stay)
+    scale[if_converted] = (1 - cycle_p_stay[if_converted]) / (1 - p_stay[if_converted])
+    matrices *= scale[..., np.newaxis]
+    states = np.arange(matrices.shape[-1])
+    matrices[..., states, states] = cycle_p_stay
 
-    # prob_matrix[HealthStates.WELL.value][HealthStates.STROKE.value] = \
-    #     prob_matrix_no_anticoag[HealthStates.WELL.value][HealthStates.STROKE.value] * \
-    #         ANTICOAG_RR
-    # prob_matrix[HealthStates.WELL.value][HealthStates.WELL.value] = \
-    #     1 - prob_matrix[HealthStates.WELL.value][HealthStates.STROKE.value] - \
-    #         prob_matrix[HealthStates.WELL.value][HealthStates.ALL_CAUSE_DEATH.value]
+    return matrices
 
-    # change the probability of moving from 'post-stroke' to 'stroke' when anti-coagulation is used
-    prob_matrix[HealthStates.POST_STROKE.value][HealthStates.STROKE.value] = \
-        prob_matrix_no_anticoag[HealthStates.POST_STROKE.value][HealthStates.STROKE.value] * \
-            ANTICOAG_RR
 
-    # change the probability of staying in 'post-stroke' when anti-coagulation is used
-    prob_matrix[HealthStates.POST_STROKE.value][HealthStates.POST_STROKE.value] = \
-        1 - prob_matrix[HealthStates.POST_STROKE.value][HealthStates.STROKE.value] - \
-        prob_matrix[HealthStates.POST_STROKE.value][HealthStates.ALL_CAUSE_DEATH.value]
+def get_annual_state_costs(therapy, annual_state_costs, anticoag_cost):
+    """
+    :param therapy: (Therapies) the selected therapy
+    :param annual_state_costs: annual cost of each health state (without the cost of therapy)
+    :param anticoag_cost: annual cost of anticoagulation (a number or a NumPy array)
+    :returns (np.ndarray) annual cost of each health state under the selected therapy,
+        of shape (shape of anticoag_cost) + (n_states, )
+    """
 
-    return prob_matrix
+    # (copied so that adding the cost of therapy does not change the inputs)
+    costs = np.array(annual_state_costs, dtype=float)
+    if therapy == Therapies.ANTICOAG:
+        anticoag_cost = np.asarray(anticoag_cost, dtype=float)
+        costs = costs + np.zeros(anticoag_cost.shape + (1, ))
+        costs[..., HealthStates.POST_STROKE.value] += anticoag_cost
+    return costs
+
+
+def get_discount_factors(discount_rate, n_time_steps, cycle_length=CYCLE_LENGTH):
+    """
+    :param discount_rate: annual discount rate (a number or a NumPy array)
+    :param n_time_steps: number of time steps
+    :param cycle_length: length of a time step (years)
+    :returns (np.ndarray) discount factor of each time step, of shape (shape of discount_rate) + (n_time_steps, )
+        (payments during time step t are discounted for 2t+1 half-cycles to correct for half cycle effect)
+    """
+    discount_rate = np.asarray(discount_rate, dtype=float)[..., np.newaxis]
+    return np.power(1 + discount_rate * cycle_length/2, -(2 * np.arange(n_time_steps) + 1))
+
+
+def get_transition_payoffs(state_payoffs):
+    """
+    :param state_payoffs: cost (or utility) of each health state over a time step, of shape (...) + (n_states, )
+    :returns (np.ndarray) payoff of each transition (i -> j) corrected for half cycle effect
+        (the average of the payoffs of states i and j), of shape (...) + (n_states, n_states)
+    """
+    state_payoffs = np.asarray(state_payoffs, dtype=float)
+    return 0.5 * (state_payoffs[..., :, np.newaxis] + state_payoffs[..., np.newaxis, :])
+
+
+def get_cycle_state_costs(annual_state_costs, cycle_length):
+    """
+    :param annual_state_costs: annual cost of each health state
+    :param cycle_length: length of a time step (years)
+    :returns (np.ndarray) cost of each health state over a time step
+        (the cost of the temporary state Stroke is the cost of a stroke, which does not depend on the cycle length)
+    """
+
+    costs = np.array(annual_state_costs, dtype=float) * cycle_length
+    costs[..., HealthStates.STROKE.value] = np.asarray(annual_state_costs)[..., HealthStates.STROKE.value]
+    return costs
+
+
+def get_cycle_state_utilities(annual_state_utilities, cycle_length):
+    """
+    :param annual_state_utilities: annual utility of each health state
+    :param cycle_length: length of a time step (years)
+    :returns (np.ndarray) utility of each health state over a time step
+        (the annual utility of the temporary state Stroke is for an acute stroke of STROKE_DURATION years
+        followed by Post-Stroke; over a time step, the acute stroke is the same and Post-Stroke is shorter,
+        or, for time steps shorter than an acute stroke, the acute stroke is cut to the time step)
+    """
+
+    annual_state_utilities = np.array(annual_state_utilities, dtype=float)
+    if cycle_length == 1:
+        return annual_state_utilities
+    utilities = annual_state_utilities * cycle_length
+
+    post_stroke_utility = annual_state_utilities[..., HealthStates.POST_STROKE.value]
+    acute_stroke_utility = annual_state_utilities[..., HealthStates.STROKE.value] \
+        - post_stroke_utility * (1 - STROKE_DURATION)
+    utilities[..., HealthStates.STROKE.value] = \
+        acute_stroke_utility * min(1, cycle_length / STROKE_DURATION) \
+        + post_stroke_utility * max(0, cycle_length - STROKE_DURATION)
+    return utilities
+
+
+def _read_only(values):
+    """ :returns a read-only NumPy array with the given values (copied if they are not already read-only) """
+
+    values = np.asarray(values, dtype=float)
+    if values.flags.writeable:
+        values = values.copy()
+        values.setflags(write=False)
+    return values
+
+
+def get_prob_matrices(therapy, p_mortality, p_stroke, p_re_stroke, p_surv, anticoag_rr):
+    """ builds the transition probability matrices for many values of inputs at once
+    (inputs can be numbers or NumPy arrays of the same shape)
+    :param therapy: (Therapies) the selected therapy
+    :param p_mortality: annual probability of death due to all causes
+    :param p_stroke: annual probability of stroke in state Well
+    :param p_re_stroke: annual probability of recurrent stroke
+    :param p_surv: probability of surviving a stroke
+    :param anticoag_rr: anticoagulation relative risk of recurrent stroke
+    :returns (np.ndarray) transition probability matrices of shape (shape of inputs) + (5, 5)
+    """
+
+    p_mortality, p_stroke, p_re_stroke, p_surv, anticoag_rr = np.broadcast_arrays(
+        p_mortality, p_stroke, p_re_stroke, p_surv, anticoag_rr)
+
+    # probability of recurrent stroke under the selected therapy
+    if therapy == Therapies.ANTICOAG:
+        p_re_stroke = p_re_stroke * anticoag_rr
+
+    matrices = np.zeros(p_mortality.shape + (len(HealthStates), len(HealthStates)))
+
+    well = HealthStates.WELL.value
+    post_stroke = HealthStates.POST_STROKE.value
+    stroke_death = HealthStates.STROKE_DEATH.value
+    all_cause_death = HealthStates.ALL_CAUSE_DEATH.value
+    stroke = HealthStates.STROKE.value
+
+    # Well
+    matrices[..., well, well] = (1 - p_mortality) * (1 - p_stroke)
+    matrices[..., well, all_cause_death] = p_mortality
+    matrices[..., well, stroke] = (1 - p_mortality) * p_stroke
+    # Post-stroke
+    matrices[..., post_stroke, post_stroke] = (1 - p_mortality) * (1 - p_re_stroke)
+    matrices[..., post_stroke, all_cause_death] = p_mortality
+    matrices[..., post_stroke, stroke] = (1 - p_mortality) * p_re_stroke
+    # Stroke-death and all-cause death are absorbing
+    matrices[..., stroke_death, stroke_death] = 1
+    matrices[..., all_cause_death, all_cause_death] = 1
+    # Stroke
+    matrices[..., stroke, post_stroke] = p_surv
+    matrices[..., stroke, stroke_death] = 1 - p_surv
+
+    return matrices
 
 
 if __name__ == '__main__':
     # tests
-    matrix_no_anticoag = get_prob_matrix_no_anticoag()
-    matrix_with_anticoag = get_prob_matrix_anticoag(matrix_no_anticoag)
-
-    print(matrix_no_anticoag)
-    print(matrix_with_anticoag)
+    for therapy in Therapies:
+        print(get_prob_matrices(therapy=therapy, p_mortality=P_MORTALITY, p_stroke=P_STROKE,
+                                p_re_stroke=P_RE_STROKE, p_surv=P_SURV, anticoag_rr=ANTICOAG_RR))
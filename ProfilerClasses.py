@@ -0,0 +1,184 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class Profiler:
+    def __init__(self, max_events=100000):
+        """ records the wall time, number of calls and peak memory of named phases of a run
+        (disabled by default; when disabled, a phase costs one attribute check)
+        :param max_events: maximum number of calls to record for the Chrome trace
+            (the statistics of phases include all calls)
+        """
+
+        self.ifEnabled = False
+        self.maxEvents = max_events
+        self.ifTrackMemory = False
+        self.phases = {}    # name: PhaseStat
+        self.events = []    # (name, start time, duration, thread id) of each call to a phase
+        self._stack = []    # phases that are running (to attribute peak memory to nested phases)
+        self._startTime = 0
+
+    def enable(self, track_memory=False):
+        """ starts recording phases
+        :param track_memory: set to True to record the peak memory of phases with tracemalloc
+            (which slows down the code)
+        """
+        self.ifEnabled = True
+        self.ifTrackMemory = track_memory
+        self._startTime = time.perf_counter()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def disable(self):
+        """ stops recording phases (the recorded phases are kept) """
+        self.ifEnabled = False
+        if self.ifTrackMemory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.ifTrackMemory = False
+
+    def reset(self):
+        """ deletes the recorded phases """
+        self.phases = {}
+        self.events = []
+        self._stack = []
+        self._startTime = time.perf_counter()
+
+    def phase(self, name):
+        """ :returns a context manager that records the code it runs as a call to the phase name
+        (a reusable no-op context manager if the profiler is disabled) """
+        if not self.ifEnabled:
+            return _NO_OP
+        return _Phase(profiler=self, name=name)
+
+    def get_report(self):
+        """ :returns (dictionary) name: dictionary of calls, total, mean and max time (seconds)
+        and peak memory (bytes above the memory in use when the phase started; None if not tracked) """
+        return {name: phase_stat.get_summary() for name, phase_stat in self.phases.items()}
+
+    def write_report(self, file_name):
+        """ writes the report of phases to a JSON file """
+        with open(file_name, 'w') as file:
+            json.dump(self.get_report(), file, indent=2)
+
+    def write_chrome_trace(self, file_name):
+        """ writes the calls to phases as a trace that can be opened in chrome://tracing or Perfetto """
+
+        trace_events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                         'pid': os.getpid(), 'tid': thread_id}
+                        for name, start, duration, thread_id in self.events]
+        with open(file_name, 'w') as file:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, file)
+
+    def print_report(self):
+        """ prints the phases sorted by their total time """
+
+        print('{:45s} {:>8s} {:>12s} {:>12s} {:>10s}'.format('Phase', 'Calls', 'Total (s)', 'Mean (s)', 'Peak (MB)'))
+        for name, summary in sorted(self.get_report().items(), key=lambda item: -item[1]['total_time']):
+            peak = '' if summary['peak_memory'] is None else '{:.1f}'.format(summary['peak_memory'] / 1e6)
+            print('{:45s} {:8d} {:12.4f} {:12.6f} {:>10s}'.format(
+                name, summary['calls'], summary['total_time'], summary['mean_time'], peak))
+
+
+class PhaseStat:
+    def __init__(self, name):
+        """ wall time, number of calls and peak memory of a phase
+        :param name: name of the phase
+        """
+        self.name = name
+        self.nCalls = 0
+        self.totalTime = 0
+        self.maxTime = 0
+        self.peakMemory = None
+
+    def record(self, duration, peak_memory=None):
+        """ records a call to this phase
+        :param duration: wall time of the call (seconds)
+        :param peak_memory: peak memory of the call (bytes; None if not tracked)
+        """
+        self.nCalls += 1
+        self.totalTime += duration
+        self.maxTime = max(self.maxTime, duration)
+        if peak_memory is not None:
+            self.peakMemory = max(self.peakMemory or 0, peak_memory)
+
+    def get_summary(self):
+        return {'calls': self.nCalls,
+                'total_time': self.totalTime,
+                'mean_time': self.totalTime / self.nCalls,
+                'max_time': self.maxTime,
+                'peak_memory': self.peakMemory}
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.startTime = 0
+        self.startMemory = 0
+        self.peakMemory = 0    # largest traced memory seen while this phase runs
+
+    def __enter__(self):
+        if self.profiler.ifTrackMemory:
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak so far belongs to the phase that is running
+            # (the peak is reset to measure this phase on its own)
+            if self.profiler._stack:
+                parent = self.profiler._stack[-1]
+                parent.peakMemory = max(parent.peakMemory, peak)
+            tracemalloc.reset_peak()
+            self.startMemory = current
+            self.peakMemory = current
+        self.profiler._stack.append(self)
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end_time = time.perf_counter()
+        self.profiler._stack.pop()
+
+        peak_memory = None
+        if self.profiler.ifTrackMemory:
+            self.peakMemory = max(self.peakMemory, tracemalloc.get_traced_memory()[1])
+            peak_memory = self.peakMemory - self.startMemory
+            if self.profiler._stack:
+                parent = self.profiler._stack[-1]
+                parent.peakMemory = max(parent.peakMemory, self.peakMemory)
+
+        duration = end_time - self.startTime
+        self.profiler.phases.setdefault(self.name, PhaseStat(name=self.name)).record(
+            duration=duration, peak_memory=peak_memory)
+        if len(self.profiler.events) < self.profiler.maxEvents:
+            self.profiler.events.append(
+                (self.name, self.startTime - self.profiler._startTime, duration, threading.get_ident()))
+        return False
+
+
+_NO_OP = contextlib.nullcontext()
+
+# the profiler of this process (enable it with PROFILER.enable())
+PROFILER = Profiler()
+
+
+def profiled(name=None):
+    """ decorator that records every call to the decorated function as a call to a phase
+    :param name: name of the phase (the qualified name of the function if not provided)
+    """
+
+    def decorator(func):
+        phase_name = func.__qualname__ if name is None else name
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.ifEnabled:
+                return func(*args, **kwargs)
+            with PROFILER.phase(phase_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,108 @@
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import InputData as D
+from InputData import ReportModes
+
+
+class Reporter:
+    def __init__(self, mode=D.REPORT_MODE, directory=D.OUTPUT_DIRECTORY, n_workers=D.N_REPORT_WORKERS):
+        """ runs the reporting functions (e.g. of SupportMarkovModel) of a run
+        in mode SHOW, functions run right away in this process (figures are shown);
+        in modes FILES and DATA_ONLY, functions run in a pool of background processes that draw figures
+        with a non-interactive backend and write files to the output directory, so simulation can continue
+        while figures are drawn and tables are built
+        (in mode FILES, open figures are saved to <name>_<i>.png and printed text to <name>.txt)
+        :param mode: (ReportModes) the reporting mode
+        :param directory: directory to write files to (modes FILES and DATA_ONLY)
+        :param n_workers: number of background processes
+        """
+        self.mode = mode
+        self.directory = os.path.abspath(directory)
+        self.nWorkers = n_workers
+        self._executor = None
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(if_wait=exc_type is None)
+        return False
+
+    def report(self, name, func, data_func=None, **kwargs):
+        """ runs a reporting function
+        :param name: name of the report (prefix of the files it is saved to in mode FILES)
+        :param func: the function that prints outcomes, draws figures or writes files
+        :param data_func: the function that only writes the machine-readable outcomes of the report
+            (run instead of func in mode DATA_ONLY; None to skip this report in mode DATA_ONLY)
+        :param kwargs: arguments of both functions (sent to a background process, so they should be picklable)
+        """
+
+        if self.mode == ReportModes.SHOW:
+            func(**kwargs)
+        elif self.mode == ReportModes.FILES:
+            self._submit(name=name, func=func, kwargs=kwargs)
+        elif data_func is not None:
+            self._submit(name=name, func=data_func, kwargs=kwargs)
+
+    def wait(self):
+        """ waits for the submitted reports to finish (raises the error of a report that failed) """
+
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+    def close(self, if_wait=True):
+        """ shuts down the background processes
+        :param if_wait: set to True to wait for the submitted reports to finish
+        """
+
+        if if_wait:
+            self.wait()
+        if self._executor is not None:
+            self._executor.shutdown(wait=if_wait, cancel_futures=not if_wait)
+            self._executor = None
+
+    def _submit(self, name, func, kwargs):
+
+        if self._executor is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._executor = ProcessPoolExecutor(max_workers=self.nWorkers,
+                                                 initializer=_initialize_worker,
+                                                 initargs=(self.directory, ))
+        self._futures.append(self._executor.submit(_run_report, func=func, kwargs=kwargs, name=name))
+
+
+def _initialize_worker(directory):
+    """ selects a backend that draws figures without a display and moves to the output directory
+    (so that files written by reporting functions go to the output directory) """
+
+    import warnings
+    import matplotlib
+    matplotlib.use('Agg')
+    # figures are saved after they are shown
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+    os.chdir(directory)
+
+
+def _run_report(func, kwargs, name):
+    """ runs a reporting function, writes the text it prints to <name>.txt
+    and saves the figures it leaves open to <name>_<i>.png """
+
+    import io
+    import matplotlib.pyplot as plt
+
+    text = io.StringIO()
+    with contextlib.redirect_stdout(text):
+        func(**kwargs)
+    if text.getvalue():
+        with open(name + '.txt', 'w') as file:
+            file.write(text.getvalue())
+
+    # figures are shown with the non-interactive backend, which leaves them open
+    for i, number in enumerate(plt.get_fignums()):
+        plt.figure(number).savefig('{}_{}.png'.format(name, i), dpi=300, bbox_inches='tight')
+    plt.close('all')
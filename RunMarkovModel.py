@@ -1,48 +1,40 @@
-import deampy.plots.histogram as hist
-import deampy.plots.sample_paths as path
-
 import InputData as D
 import MarkovClasses as Cls
 import ParameterClasses as P
+import ReportClasses as Report
 import SupportMarkovModel as Support
+from ProfilerClasses import PROFILER
+
+
+if __name__ == '__main__':
+
+    if D.IF_PROFILE:
+        PROFILER.enable(track_memory=D.IF_PROFILE_MEMORY)
+
+    # selected therapy
+    therapy = P.Therapies.NONE
+
+    # create a cohort
+    myCohort = Cls.Cohort(id=1,
+                          pop_size=D.POP_SIZE,
+                          parameters=P.get_parameters(therapy=therapy))
+
+    # simulate the cohort over the specified time steps
+    myCohort.simulate(n_time_steps=D.SIM_TIME_STEPS, n_workers=D.N_WORKERS)
+
+    # report the outcomes (in the background if REPORT_MODE is FILES or DATA_ONLY)
+    with Report.Reporter(mode=D.REPORT_MODE) as reporter:
+
+        # plot the survival curve and the histograms of survival times and number of strokes
+        reporter.report(name='cohort_outcomes', func=Support.plot_cohort_outcomes,
+                        sim_outcomes=myCohort.cohortOutcomes)
 
-# selected therapy
-therapy = P.Therapies.NONE
-
-# create a cohort
-myCohort = Cls.Cohort(id=1,
-                      pop_size=D.POP_SIZE,
-                      parameters=P.Parameters(therapy=therapy))
-
-# simulate the cohort over the specified time steps
-myCohort.simulate(n_time_steps=D.SIM_TIME_STEPS)
-
-# plot the sample path (survival curve)
-path.plot_sample_path(
-    sample_path=myCohort.cohortOutcomes.nLivingPatients,
-    title='Survival Curve',
-    x_label='Time-Step (Year)',
-    y_label='Number Survived',
-    x_range=[0, 50])
-
-# plot the histogram of survival times
-hist.plot_histogram(
-    data=myCohort.cohortOutcomes.survivalTimes,
-    title='Histogram of Patient Survival Time',
-    x_label='Survival Time (Year)',
-    y_label='Count',
-    bin_width=5)
-
-# histogram of number of strokes
-hist.plot_histogram(
-    data=myCohort.cohortOutcomes.nStrokes,
-    title='Histogram of Number of Strokes',
-    x_label='Number of Strokes',
-    y_label='Count',
-    bin_width=1
-)
-
-# print the outcomes of this simulated cohort
-Support.print_outcomes(sim_outcomes=myCohort.cohortOutcomes,
-                       therapy_name=therapy)
+        # print the outcomes of this simulated cohort
+        reporter.report(name='outcomes', func=Support.print_outcomes, data_func=Support.write_outcomes,
+                        sim_outcomes=myCohort.cohortOutcomes,
+                        therapy_name=therapy)
 
+    if D.IF_PROFILE:
+        PROFILER.print_report()
+        PROFILER.write_report(file_name=D.PROFILE_REPORT_FILE)
+        PROFILER.write_chrome_trace(file_name=D.PROFILE_TRACE_FILE)
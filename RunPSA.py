@@ -0,0 +1,16 @@
+import InputData as D
+import PSAClasses as PSA
+import SupportMarkovModel as Support
+
+
+if __name__ == '__main__':
+
+    # sample the inputs and simulate both therapies for each parameter draw
+    psa = PSA.PSA(n_draws=D.PSA_N_DRAWS, pop_size=D.PSA_POP_SIZE)
+    psa.simulate(n_time_steps=D.SIM_TIME_STEPS, n_workers=D.N_WORKERS)
+
+    # report the CEA results (outcomes of the two therapies are paired by parameter draw)
+    Support.report_CEA_CBA(sim_outcomes_none=psa.outcomesNone,
+                           sim_outcomes_anticoag=psa.outcomesAnticoag,
+                           if_paired=True,
+                           if_observations_are_draws=True)
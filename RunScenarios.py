@@ -0,0 +1,18 @@
+import sys
+
+import InputData as D
+import ScenarioClasses as Sc
+import SupportMarkovModel as Support
+
+
+if __name__ == '__main__':
+
+    # the scenario grid is read from the file given in the command line (Scenarios.json by default)
+    config_file_name = sys.argv[1] if len(sys.argv) > 1 else 'Scenarios.json'
+    runner = Sc.get_scenario_runner(config_file_name=config_file_name)
+
+    # simulate both therapies under all scenarios (cohorts found in the cache are not simulated again)
+    runner.simulate(n_workers=D.N_WORKERS)
+
+    # print the outcomes of scenarios
+    Support.print_scenario_outcomes(scenario_runner=runner)
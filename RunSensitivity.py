@@ -0,0 +1,25 @@
+import InputData as D
+import ReportClasses as Report
+import SensitivityClasses as Sen
+import SupportMarkovModel as Support
+
+
+if __name__ == '__main__':
+
+    # one-way sensitivity analysis of the inputs in SENSITIVITY_RANGES (tornado diagram)
+    oneWay = Sen.OneWaySensitivity()
+    oneWay.simulate(n_time_steps=D.SIM_TIME_STEPS, n_workers=D.N_WORKERS)
+
+    # two-way sensitivity analysis
+    twoWay = Sen.TwoWaySensitivity(name_x=D.TWO_WAY_INPUT_X, values_x=D.TWO_WAY_VALUES_X,
+                                   name_y=D.TWO_WAY_INPUT_Y, values_y=D.TWO_WAY_VALUES_Y)
+    twoWay.simulate(n_time_steps=D.SIM_TIME_STEPS, n_workers=D.N_WORKERS)
+
+    # report the outcomes (in the background if REPORT_MODE is FILES or DATA_ONLY)
+    with Report.Reporter(mode=D.REPORT_MODE) as reporter:
+
+        reporter.report(name='tornado', func=Support.plot_tornado, one_way_sensitivity=oneWay)
+        reporter.report(name='tornado_table', func=Support.print_tornado_table, data_func=Support.write_tornado_table,
+                        one_way_sensitivity=oneWay)
+        reporter.report(name='two_way_table', func=Support.print_two_way_table,
+                        data_func=Support.write_two_way_table, two_way_sensitivity=twoWay)
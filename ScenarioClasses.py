@@ -0,0 +1,264 @@
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+
+import InputData as D
+import MarkovClasses as Cls
+import ParameterClasses as P
+from ProfilerClasses import profiled
+
+# inputs of a scenario and their default values
+# (a scenario grid sets a list of values for some of these inputs)
+DEFAULT_INPUTS = {
+    'p_mortality': D.P_MORTALITY,
+    'p_stroke': D.P_STROKE,
+    'p_re_stroke': D.P_RE_STROKE,
+    'p_surv': D.P_SURV,
+    'anticoag_rr': D.ANTICOAG_RR,
+    'anticoag_cost': D.ANTICOAG_COST,
+    'annual_state_costs': list(D.ANNUAL_STATE_COST),
+    'annual_state_utilities': list(D.ANNUAL_STATE_UTILITY),
+    'discount_rate': D.DISCOUNT,
+    'n_time_steps': D.SIM_TIME_STEPS,
+    'cycle_length': D.CYCLE_LENGTH,
+}
+
+# inputs of the annual transition probabilities
+PROBABILITY_INPUTS = ('p_mortality', 'p_stroke', 'p_re_stroke', 'p_surv', 'anticoag_rr')
+# inputs of the transition probabilities over a time step (scenarios that only differ in other inputs
+# share the state paths of their patients, which are simulated once and then re-scored)
+TRANSITION_INPUTS = PROBABILITY_INPUTS + ('cycle_length', )
+
+# settings of transition probabilities that change over time (the same for all scenarios)
+TIME_VARYING_SETTINGS = {
+    'life_table': D.LIFE_TABLE if D.IF_AGE_DEPENDENT_MORTALITY else None,
+    'age_at_start': D.AGE_AT_START,
+    'anticoag_effect_duration': D.ANTICOAG_EFFECT_DURATION,
+    'anticoag_waning_period': D.ANTICOAG_WANING_PERIOD,
+}
+
+CACHE_VERSION = 2   # to be increased when a change to the model invalidates the cached results
+
+
+class ScenarioRunner:
+    def __init__(self, scenarios, pop_size, cohort_id=0, engine=Cls.Engines.VECTORIZED, cache_directory=None):
+        """ simulates both therapies under a list of scenarios
+        (cohorts of all scenarios and therapies use the same cohort id, so they share random numbers)
+        :param scenarios: (list) scenarios as dictionaries of inputs (see get_scenarios())
+        :param pop_size: cohort population size
+        :param cohort_id: id of the cohorts
+        :param engine: (Engines) the engine to simulate the patients with
+        :param cache_directory: directory to store the outcomes and the state paths of simulated cohorts in
+            (cohorts found in this directory are not simulated again; None to not cache outcomes)
+        """
+        self.scenarios = scenarios
+        self.popSize = pop_size
+        self.cohortId = cohort_id
+        self.engine = engine
+        self.cacheDirectory = cache_directory
+
+        # (list) outcomes of each scenario as a dictionary therapy: CohortOutcomes
+        self.outcomes = []
+        self.nSimulatedCohorts = 0  # number of cohorts simulated in the last run
+        self.nCachedCohorts = 0     # number of cohorts read from the cache in the last run
+
+    @profiled()
+    def simulate(self, n_workers=1):
+        """ calculates the outcomes of all scenarios
+        :param n_workers: number of processes (1 to simulate in this process, None to use all cores)
+        """
+
+        self.outcomes = [{} for s in self.scenarios]
+        self.nSimulatedCohorts = 0
+        self.nCachedCohorts = 0
+
+        # group the cohorts that are not cached by their transition probabilities
+        groups = {}
+        for i, scenario in enumerate(self.scenarios):
+            for therapy in P.Therapies:
+                outcomes = self._read_cache(scenario=scenario, therapy=therapy)
+                if outcomes is not None:
+                    self.outcomes[i][therapy] = outcomes
+                    self.nCachedCohorts += 1
+                else:
+                    groups.setdefault(_get_transition_key(scenario=scenario, therapy=therapy), []).append(i)
+
+        # simulate the state paths of one cohort per group over the longest horizon of the group
+        # (paths over shorter horizons are the first time steps of these paths)
+        cohorts = {}
+        horizons = {}
+        paths_file_names = {}
+        for key, scenario_indices in groups.items():
+            therapy = key[0]
+            scenario = max((self.scenarios[i] for i in scenario_indices), key=lambda s: s['n_time_steps'])
+
+            # paths recorded in the cache by an earlier run are re-scored without simulating again
+            paths_file_name = None
+            if self.cacheDirectory is not None:
+                os.makedirs(self.cacheDirectory, exist_ok=True)
+                paths_file_name = self._get_cache_file_name(
+                    therapy=therapy, inputs=_get_transition_inputs(scenario=scenario, therapy=therapy),
+                    extension='.paths.npy')
+                paths_file_names[key] = paths_file_name
+                if os.path.exists(paths_file_name) \
+                        and np.load(paths_file_name, mmap_mode='r').shape[1] >= scenario['n_time_steps']:
+                    continue
+
+            cohorts[key] = Cls.Cohort(id=self.cohortId,
+                                      pop_size=self.popSize,
+                                      parameters=get_scenario_parameters(scenario=scenario, therapy=therapy),
+                                      if_record_paths=True,
+                                      state_paths_file=paths_file_name)
+            horizons[key] = scenario['n_time_steps']
+
+        # cohorts with the same horizon are simulated together
+        for n_time_steps in sorted(set(horizons.values())):
+            Cls.simulate_cohorts(cohorts=[cohorts[key] for key in cohorts if horizons[key] == n_time_steps],
+                                 n_time_steps=n_time_steps,
+                                 engine=self.engine,
+                                 n_workers=n_workers)
+        self.nSimulatedCohorts = len(cohorts)
+
+        # calculate the outcomes of each scenario from the state paths of its group
+        for key, scenario_indices in groups.items():
+            therapy = key[0]
+            for i in scenario_indices:
+                scenario = self.scenarios[i]
+                parameters = get_scenario_parameters(scenario=scenario, therapy=therapy)
+                if key in paths_file_names:
+                    outcomes = Cls.replay_state_paths(file_name=paths_file_names[key],
+                                                      parameters=parameters,
+                                                      n_time_steps=scenario['n_time_steps'])
+                else:
+                    outcomes = Cls.score_state_paths(
+                        state_paths=cohorts[key].cohortOutcomes.statePaths[:, :scenario['n_time_steps']],
+                        parameters=parameters)
+                    outcomes.calculate_cohort_outcomes(initial_pop_size=self.popSize,
+                                                       n_time_steps=scenario['n_time_steps'])
+                self.outcomes[i][therapy] = outcomes
+                self._write_cache(scenario=scenario, therapy=therapy, outcomes=outcomes)
+
+    def _get_cache_file_name(self, therapy, inputs, extension='.npz'):
+        """ :returns the name of the file in the cache that stores the outcomes (or state paths) of a cohort
+        (a hash of everything they depend on) """
+
+        key = json.dumps({'version': CACHE_VERSION,
+                          'therapy': therapy.name,
+                          'inputs': inputs,
+                          'time_varying': TIME_VARYING_SETTINGS,
+                          'pop_size': self.popSize,
+                          'cohort_id': self.cohortId,
+                          'engine': self.engine.name,
+                          'block_size': D.BLOCK_SIZE},
+                         sort_keys=True)
+        return os.path.join(self.cacheDirectory, hashlib.sha256(key.encode()).hexdigest() + extension)
+
+    def _read_cache(self, scenario, therapy):
+        """ :returns (CohortOutcomes) the cached outcomes of a cohort or None if they are not cached """
+
+        if self.cacheDirectory is None:
+            return None
+        file_name = self._get_cache_file_name(therapy=therapy, inputs=scenario)
+        if not os.path.exists(file_name):
+            return None
+
+        with np.load(file_name) as data:
+            outcomes = Cls.CohortOutcomes(pop_size=self.popSize, cycle_length=scenario['cycle_length'])
+            outcomes.patientSurvivalTimes[:] = data['survival_times']
+            outcomes.nStrokes[:] = data['n_strokes']
+            outcomes.costs[:] = data['costs']
+            outcomes.utilities[:] = data['utilities']
+        outcomes.calculate_cohort_outcomes(initial_pop_size=self.popSize, n_time_steps=scenario['n_time_steps'])
+        return outcomes
+
+    def _write_cache(self, scenario, therapy, outcomes):
+
+        if self.cacheDirectory is None:
+            return
+        os.makedirs(self.cacheDirectory, exist_ok=True)
+        file_name = self._get_cache_file_name(therapy=therapy, inputs=scenario)
+
+        # written to a temporary file first so that an interrupted run does not leave a partial file
+        temp_file_name = file_name + '.tmp.npz'
+        np.savez(temp_file_name,
+                 survival_times=outcomes.patientSurvivalTimes,
+                 n_strokes=outcomes.nStrokes,
+                 costs=outcomes.costs,
+                 utilities=outcomes.utilities)
+        os.replace(temp_file_name, file_name)
+
+
+def get_scenarios(grid):
+    """ expands a scenario grid into a list of scenarios (one for each combination of values)
+    :param grid: (dictionary) input name: list of values (inputs not in the grid take their default values)
+    :returns (list) scenarios as dictionaries of inputs
+    """
+
+    for name in grid:
+        if name not in DEFAULT_INPUTS:
+            raise ValueError('Invalid input {} in the scenario grid (valid inputs are {}).'
+                             .format(name, ', '.join(DEFAULT_INPUTS)))
+
+    scenarios = []
+    for values in itertools.product(*grid.values()):
+        scenario = dict(DEFAULT_INPUTS)
+        scenario.update(zip(grid.keys(), values))
+        scenarios.append(scenario)
+    return scenarios
+
+
+def get_scenario_parameters(scenario, therapy):
+    """
+    :param scenario: (dictionary) inputs of the scenario
+    :param therapy: (Therapies) the selected therapy
+    :returns (Parameters) parameters of the therapy under this scenario
+    """
+
+    return P.Parameters(therapy=therapy,
+                        prob_matrix=P.get_prob_matrix_schedule(
+                            therapy=therapy,
+                            n_time_steps=scenario['n_time_steps'],
+                            cycle_length=scenario['cycle_length'],
+                            **{name: scenario[name] for name in PROBABILITY_INPUTS},
+                            **TIME_VARYING_SETTINGS),
+                        annual_state_costs=scenario['annual_state_costs'],
+                        annual_state_utilities=scenario['annual_state_utilities'],
+                        anticoag_cost=scenario['anticoag_cost'],
+                        discount_rate=scenario['discount_rate'],
+                        n_time_steps=scenario['n_time_steps'],
+                        cycle_length=scenario['cycle_length'])
+
+
+def get_scenario_runner(config_file_name):
+    """ reads the settings and the scenario grid from a JSON file with keys
+    'pop_size', 'grid' and optionally 'cohort_id', 'engine' (name of an engine) and 'cache_directory'
+    (see Scenarios.json)
+    :param config_file_name: name of the JSON file
+    :returns (ScenarioRunner) the scenario runner
+    """
+
+    with open(config_file_name) as file:
+        config = json.load(file)
+
+    return ScenarioRunner(scenarios=get_scenarios(grid=config['grid']),
+                          pop_size=config['pop_size'],
+                          cohort_id=config.get('cohort_id', 0),
+                          engine=Cls.Engines[config.get('engine', Cls.Engines.VECTORIZED.name)],
+                          cache_directory=config.get('cache_directory'))
+
+
+def _get_transition_inputs(scenario, therapy):
+    """ :returns (dictionary) the inputs of the transition probabilities of a therapy under a scenario
+    (the relative risk of anticoagulation does not change the transition probabilities under no therapy) """
+
+    return {name: scenario[name] for name in TRANSITION_INPUTS
+            if not (name == 'anticoag_rr' and therapy == P.Therapies.NONE)}
+
+
+def _get_transition_key(scenario, therapy):
+    """ :returns a key that is the same for two cohorts if their transition probabilities are the same """
+
+    return (therapy, ) + tuple(_get_transition_inputs(scenario=scenario, therapy=therapy).values())
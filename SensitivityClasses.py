@@ -0,0 +1,261 @@
+import numpy as np
+
+import InputData as D
+import MarkovClasses as Cls
+import MarkovTraceClasses as Trace
+import ParameterClasses as P
+import ScenarioClasses as Sc
+from InputData import SensitivityMethods
+from ProfilerClasses import profiled
+
+# inputs that can be varied in a sensitivity analysis (their base values are in ScenarioClasses.DEFAULT_INPUTS)
+SENSITIVITY_INPUTS = Sc.PROBABILITY_INPUTS + ('anticoag_cost', 'discount_rate')
+
+
+class OneWaySensitivity:
+    def __init__(self, ranges=D.SENSITIVITY_RANGES, n_points=D.SENSITIVITY_N_POINTS, wtp=D.WTP,
+                 method=D.SENSITIVITY_METHOD, pop_size=D.SENSITIVITY_POP_SIZE, cohort_id=0):
+        """ one-way sensitivity analysis: each input is swept over its range while the other inputs
+        take their base values (the sweeps of all inputs are evaluated together as one stacked grid)
+        :param ranges: (dictionary) input name: (low, high)
+        :param n_points: number of evenly spaced values of each input from low to high
+        :param wtp: willingness-to-pay per QALY to calculate the net monetary benefit
+        :param method: (SensitivityMethods) how the outcomes of grid points are calculated
+        :param pop_size: cohort population size (method SIMULATION)
+        :param cohort_id: id of the cohorts (method SIMULATION)
+        """
+        _check_inputs(names=ranges.keys())
+
+        self.names = list(ranges)
+        self.ranges = ranges
+        self.wtp = wtp
+        self.method = method
+        self.popSize = pop_size
+        self.cohortId = cohort_id
+
+        # values of each input, shape (n_inputs, n_points)
+        self.values = np.array([np.linspace(low, high, n_points) for low, high in ranges.values()], dtype=float)
+
+        # incremental outcomes of anticoagulation with respect to no therapy at each grid point,
+        # shape (n_inputs, n_points), and at the base values of inputs
+        self.incrementalCosts = None
+        self.incrementalUtilities = None
+        self.incrementalNMBs = None
+        self.baseNMB = None
+
+    @profiled()
+    def simulate(self, n_time_steps=D.SIM_TIME_STEPS, cycle_length=D.CYCLE_LENGTH, n_workers=1):
+        """ calculates the incremental outcomes of all grid points
+        :param n_time_steps: number of simulation time steps
+        :param cycle_length: length of a simulation time step (years)
+        :param n_workers: number of processes (method SIMULATION)
+        """
+
+        # input i takes the values of row i and the other inputs take their base values
+        inputs = {}
+        for i, name in enumerate(self.names):
+            inputs[name] = np.full(self.values.shape, Sc.DEFAULT_INPUTS[name], dtype=float)
+            inputs[name][i] = self.values[i]
+
+        # the base point is evaluated with the grid points
+        for name in inputs:
+            inputs[name] = np.append(inputs[name].ravel(), Sc.DEFAULT_INPUTS[name])
+
+        costs, utilities = get_incremental_outcomes(inputs=inputs,
+                                                    n_time_steps=n_time_steps,
+                                                    cycle_length=cycle_length,
+                                                    method=self.method,
+                                                    pop_size=self.popSize,
+                                                    cohort_id=self.cohortId,
+                                                    n_workers=n_workers)
+        nmbs = self.wtp * utilities - costs
+
+        self.incrementalCosts = costs[:-1].reshape(self.values.shape)
+        self.incrementalUtilities = utilities[:-1].reshape(self.values.shape)
+        self.incrementalNMBs = nmbs[:-1].reshape(self.values.shape)
+        self.baseNMB = nmbs[-1]
+
+    def get_tornado_rows(self):
+        """ :returns (list) a row (name, low value, high value, NMB at low value, NMB at high value)
+        for each input, sorted by the swing of the incremental net monetary benefit (largest first) """
+
+        rows = [(name, self.values[i, 0], self.values[i, -1],
+                 self.incrementalNMBs[i, 0], self.incrementalNMBs[i, -1])
+                for i, name in enumerate(self.names)]
+        return sorted(rows, key=lambda row: -abs(row[4] - row[3]))
+
+
+class TwoWaySensitivity:
+    def __init__(self, name_x, values_x, name_y, values_y, wtp=D.WTP,
+                 method=D.SENSITIVITY_METHOD, pop_size=D.SENSITIVITY_POP_SIZE, cohort_id=0):
+        """ two-way sensitivity analysis: two inputs are varied over a grid of values while the other inputs
+        take their base values (all grid points are evaluated together)
+        :param name_x: name of the first input (rows of the grid)
+        :param values_x: values of the first input
+        :param name_y: name of the second input (columns of the grid)
+        :param values_y: values of the second input
+        :param wtp: willingness-to-pay per QALY to calculate the net monetary benefit
+        :param method: (SensitivityMethods) how the outcomes of grid points are calculated
+        :param pop_size: cohort population size (method SIMULATION)
+        :param cohort_id: id of the cohorts (method SIMULATION)
+        """
+        _check_inputs(names=(name_x, name_y))
+        if name_x == name_y:
+            raise ValueError('The two inputs of a two-way sensitivity analysis should be different.')
+
+        self.nameX = name_x
+        self.valuesX = np.asarray(values_x, dtype=float)
+        self.nameY = name_y
+        self.valuesY = np.asarray(values_y, dtype=float)
+        self.wtp = wtp
+        self.method = method
+        self.popSize = pop_size
+        self.cohortId = cohort_id
+
+        # incremental outcomes of anticoagulation with respect to no therapy, shape (len(values_x), len(values_y))
+        self.incrementalCosts = None
+        self.incrementalUtilities = None
+        self.incrementalNMBs = None
+
+    @profiled()
+    def simulate(self, n_time_steps=D.SIM_TIME_STEPS, cycle_length=D.CYCLE_LENGTH, n_workers=1):
+        """ calculates the incremental outcomes of all grid points
+        :param n_time_steps: number of simulation time steps
+        :param cycle_length: length of a simulation time step (years)
+        :param n_workers: number of processes (method SIMULATION)
+        """
+
+        # the values of the two inputs broadcast to the grid
+        inputs = {self.nameX: self.valuesX[:, np.newaxis],
+                  self.nameY: self.valuesY[np.newaxis, :]}
+
+        costs, utilities = get_incremental_outcomes(inputs=inputs,
+                                                    n_time_steps=n_time_steps,
+                                                    cycle_length=cycle_length,
+                                                    method=self.method,
+                                                    pop_size=self.popSize,
+                                                    cohort_id=self.cohortId,
+                                                    n_workers=n_workers)
+
+        self.incrementalCosts = costs
+        self.incrementalUtilities = utilities
+        self.incrementalNMBs = self.wtp * utilities - costs
+
+
+@profiled()
+def get_incremental_outcomes(inputs, n_time_steps=D.SIM_TIME_STEPS, cycle_length=D.CYCLE_LENGTH,
+                             method=SensitivityMethods.TRACE, pop_size=D.SENSITIVITY_POP_SIZE, cohort_id=0,
+                             n_workers=1):
+    """ calculates the incremental discounted cost and utility of anticoagulation with respect to no therapy
+    for many values of inputs at once
+    :param inputs: (dictionary) input name: values (numbers or NumPy arrays that broadcast to a common shape;
+        inputs not in the dictionary take their base values)
+    :param n_time_steps: number of simulation time steps
+    :param cycle_length: length of a simulation time step (years)
+    :param method: (SensitivityMethods) how the outcomes are calculated
+    :param pop_size: cohort population size (method SIMULATION)
+    :param cohort_id: id of the cohorts (method SIMULATION)
+    :param n_workers: number of processes (method SIMULATION)
+    :returns (tuple of np.ndarray) incremental cost and utility of each combination of inputs
+    """
+
+    _check_inputs(names=inputs.keys())
+    values = {name: np.asarray(inputs.get(name, Sc.DEFAULT_INPUTS[name]), dtype=float)
+              for name in SENSITIVITY_INPUTS}
+    shape = np.broadcast_shapes(*(value.shape for value in values.values()))
+    prob_shape = np.broadcast_shapes(*(values[name].shape for name in Sc.PROBABILITY_INPUTS))
+
+    costs = {}
+    utilities = {}
+    for therapy in P.Therapies:
+        prob_matrices = P.get_prob_matrix_schedule(therapy=therapy,
+                                                   n_time_steps=n_time_steps,
+                                                   cycle_length=cycle_length,
+                                                   **{name: values[name] for name in Sc.PROBABILITY_INPUTS},
+                                                   **Sc.TIME_VARYING_SETTINGS)
+        # matrices that do not change over time are given one time step
+        if prob_matrices.ndim == len(prob_shape) + 2:
+            prob_matrices = prob_matrices[..., np.newaxis, :, :]
+
+        if method == SensitivityMethods.TRACE:
+            costs[therapy], utilities[therapy] = _get_expected_outcomes(therapy=therapy,
+                                                                        prob_matrices=prob_matrices,
+                                                                        values=values,
+                                                                        n_time_steps=n_time_steps,
+                                                                        cycle_length=cycle_length)
+        else:
+            costs[therapy], utilities[therapy] = _get_simulated_outcomes(therapy=therapy,
+                                                                         prob_matrices=prob_matrices,
+                                                                         values=values,
+                                                                         shape=shape,
+                                                                         n_time_steps=n_time_steps,
+                                                                         cycle_length=cycle_length,
+                                                                         pop_size=pop_size,
+                                                                         cohort_id=cohort_id,
+                                                                         n_workers=n_workers)
+
+    incremental_costs = costs[P.Therapies.ANTICOAG] - costs[P.Therapies.NONE]
+    incremental_utilities = utilities[P.Therapies.ANTICOAG] - utilities[P.Therapies.NONE]
+    return np.broadcast_to(incremental_costs, shape), np.broadcast_to(incremental_utilities, shape)
+
+
+def _get_expected_outcomes(therapy, prob_matrices, values, n_time_steps, cycle_length):
+    """ :returns (tuple of np.ndarray) expected discounted cost and utility per patient under a therapy
+    (the arrays of parameters keep the shapes of the inputs they depend on and are broadcast in the trace) """
+
+    prob_matrices = P.get_cycle_prob_matrix(annual_prob_matrix=prob_matrices, cycle_length=cycle_length)
+
+    state_costs = P.get_cycle_state_costs(
+        annual_state_costs=P.get_annual_state_costs(therapy=therapy,
+                                                    annual_state_costs=D.ANNUAL_STATE_COST,
+                                                    anticoag_cost=values['anticoag_cost']),
+        cycle_length=cycle_length)
+    state_utilities = P.get_cycle_state_utilities(annual_state_utilities=D.ANNUAL_STATE_UTILITY,
+                                                  cycle_length=cycle_length)
+
+    return Trace.get_expected_outcomes(
+        prob_matrices=prob_matrices,
+        transition_costs=P.get_transition_payoffs(state_payoffs=state_costs),
+        transition_utilities=P.get_transition_payoffs(state_payoffs=state_utilities),
+        discount_factors=P.get_discount_factors(discount_rate=values['discount_rate'],
+                                                n_time_steps=n_time_steps,
+                                                cycle_length=cycle_length))
+
+
+def _get_simulated_outcomes(therapy, prob_matrices, values, shape, n_time_steps, cycle_length,
+                            pop_size, cohort_id, n_workers):
+    """ :returns (tuple of np.ndarray) mean discounted cost and utility of cohorts simulated under a therapy
+    (one cohort per grid point; all cohorts use the same id, so they share random numbers) """
+
+    prob_matrices = np.broadcast_to(prob_matrices, shape + prob_matrices.shape[-3:])
+    anticoag_costs = np.broadcast_to(values['anticoag_cost'], shape)
+    discount_rates = np.broadcast_to(values['discount_rate'], shape)
+
+    cohorts = []
+    for index in np.ndindex(*shape):
+        params = P.Parameters(therapy=therapy,
+                              # (a single matrix if the transition probabilities do not change over time)
+                              prob_matrix=prob_matrices[index] if prob_matrices.shape[-3] > 1
+                              else prob_matrices[index][0],
+                              anticoag_cost=anticoag_costs[index],
+                              discount_rate=discount_rates[index],
+                              n_time_steps=n_time_steps,
+                              cycle_length=cycle_length)
+        cohorts.append(Cls.Cohort(id=cohort_id, pop_size=pop_size, parameters=params, if_streaming=True))
+
+    Cls.simulate_cohorts(cohorts=cohorts,
+                         n_time_steps=n_time_steps,
+                         engine=Cls.Engines.VECTORIZED,
+                         n_workers=n_workers)
+
+    costs = np.array([c.cohortOutcomes.statCost.get_mean() for c in cohorts]).reshape(shape)
+    utilities = np.array([c.cohortOutcomes.statUtility.get_mean() for c in cohorts]).reshape(shape)
+    return costs, utilities
+
+
+def _check_inputs(names):
+
+    for name in names:
+        if name not in SENSITIVITY_INPUTS:
+            raise ValueError('Invalid input {} for sensitivity analysis (valid inputs are {}).'
+                             .format(name, ', '.join(SENSITIVITY_INPUTS)))
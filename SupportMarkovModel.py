@@ -1,11 +1,20 @@
-import deampy.econ_eval as econ
-import deampy.plots.histogram as hist
-import deampy.plots.sample_paths as path
-import deampy.statistics as stat
+import csv
+import json
+from enum import Enum
 
+import deampy.format_functions as F
+import numpy as np
+
+import CEAClasses as CE
 import InputData as D
+import ParameterClasses as P
+from ProfilerClasses import profiled
+
+# (deampy's plotting, statistics and economic evaluation modules load matplotlib and SciPy,
+# so they are imported by the functions that use them)
 
 
+@profiled()
 def print_outcomes(sim_outcomes, therapy_name):
     """ prints the outcomes of a simulated cohort
     :param sim_outcomes: outcomes of a simulated cohort
@@ -49,16 +58,75 @@ def print_outcomes(sim_outcomes, therapy_name):
     print("")
 
 
+@profiled()
+def print_expected_outcomes(expected_outcomes, therapy_name):
+    """ prints the expected outcomes of a cohort calculated with a Markov trace
+    (point estimates, which have no confidence intervals)
+    :param expected_outcomes: (DeterministicOutcomes) expected outcomes of a cohort
+    :param therapy_name: the name of the selected therapy
+    """
+
+    print(therapy_name)
+    print("  Expected mean survival time:",
+          F.format_number(number=expected_outcomes.statSurvivalTime.get_mean(), deci=2))
+    print("  Expected mean number of strokes:",
+          F.format_number(number=expected_outcomes.statNumStrokes.get_mean(), deci=2))
+    print("  Expected discounted cost:",
+          F.format_number(number=expected_outcomes.statCost.get_mean(), deci=0, format=','))
+    print("  Expected discounted utility:",
+          F.format_number(number=expected_outcomes.statUtility.get_mean(), deci=2))
+    print("")
+
+
+@profiled()
+def plot_cohort_outcomes(sim_outcomes):
+    """ draws the survival curve and the histograms of survival times and number of strokes
+    :param sim_outcomes: outcomes of a simulated cohort
+    """
+
+    import deampy.plots.histogram as hist
+    import deampy.plots.sample_paths as path
+
+    # plot the sample path (survival curve)
+    path.plot_sample_path(
+        sample_path=get_sample_path(survival_curve=sim_outcomes.nLivingPatients),
+        title='Survival Curve',
+        x_label='Time-Step (Year)',
+        y_label='Number Survived',
+        x_range=[0, 50])
+
+    # plot the histogram of survival times
+    hist.plot_histogram(
+        data=sim_outcomes.survivalTimes,
+        title='Histogram of Patient Survival Time',
+        x_label='Survival Time (Year)',
+        y_label='Count',
+        bin_width=5)
+
+    # histogram of number of strokes
+    hist.plot_histogram(
+        data=sim_outcomes.nStrokes,
+        title='Histogram of Number of Strokes',
+        x_label='Number of Strokes',
+        y_label='Count',
+        bin_width=1
+    )
+
+
+@profiled()
 def plot_survival_curves_and_histograms(sim_outcomes_none, sim_outcomes_anticoag):
     """ draws the survival curves and the histograms of time until HIV deaths
     :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
     :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagulation
     """
 
+    import deampy.plots.histogram as hist
+    import deampy.plots.sample_paths as path
+
     # get survival curves of both treatments
     survival_curves = [
-        sim_outcomes_none.nLivingPatients,
-        sim_outcomes_anticoag.nLivingPatients
+        get_sample_path(survival_curve=sim_outcomes_none.nLivingPatients),
+        get_sample_path(survival_curve=sim_outcomes_anticoag.nLivingPatients)
     ]
 
     # graph survival curve
@@ -90,13 +158,22 @@ def plot_survival_curves_and_histograms(sim_outcomes_none, sim_outcomes_anticoag
     )
 
 
-def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag):
+@profiled()
+def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag, if_paired=False):
     """ prints average increase in survival time, discounted cost, and discounted utility
     under combination therapy compared to mono therapy
     :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
     :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagulation
+    :param if_paired: set to True if the patients of the two cohorts are paired
+        (simulated with common random numbers); the increase in survival time is always
+        estimated from independent samples since it is only observed for patients who die
     """
 
+    import deampy.statistics as stat
+
+    # statistics of the differences of paired or independent observations
+    difference_stat = stat.DifferenceStatPaired if if_paired else stat.DifferenceStatIndp
+
     # increase in mean survival time under anticoagulation therapy with respect to no therapy
     increase_survival_time = stat.DifferenceStatIndp(
         name='Increase in mean survival time',
@@ -112,7 +189,7 @@ def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag):
           estimate_CI)
 
     # increase in mean discounted cost under combination therapy with respect to mono therapy
-    increase_discounted_cost = stat.DifferenceStatIndp(
+    increase_discounted_cost = difference_stat(
         name='Increase in mean discounted cost',
         x=sim_outcomes_anticoag.costs,
         y_ref=sim_outcomes_none.costs)
@@ -127,7 +204,7 @@ def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag):
           estimate_CI)
 
     # increase in mean discounted utility under combination therapy with respect to mono therapy
-    increase_discounted_utility = stat.DifferenceStatIndp(
+    increase_discounted_utility = difference_stat(
         name='Increase in mean discounted utility',
         x=sim_outcomes_anticoag.utilities,
         y_ref=sim_outcomes_none.utilities)
@@ -141,7 +218,7 @@ def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag):
           estimate_CI)
 
     # change in number of strokes
-    increase_number_strokes = stat.DifferenceStatIndp(
+    increase_number_strokes = difference_stat(
         name='change in number of strokes',
         x=sim_outcomes_anticoag.nStrokes,
         y_ref=sim_outcomes_none.nStrokes)
@@ -156,12 +233,159 @@ def print_comparative_outcomes(sim_outcomes_none, sim_outcomes_anticoag):
           estimate_CI)
 
 
-def report_CEA_CBA(sim_outcomes_none, sim_outcomes_anticoag):
+@profiled()
+def report_CEA_CBA(sim_outcomes_none, sim_outcomes_anticoag, if_paired=False, if_observations_are_draws=False,
+                   backend=D.CEA_BACKEND):
     """ performs cost-effectiveness and cost-benefit analyses
     :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
     :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagultation therapy
+    :param if_paired: set to True if the costs and utilities of the two strategies are paired
+        (e.g. outcomes of the same parameter draws in a probabilistic sensitivity analysis)
+    :param if_observations_are_draws: set to True if the paired costs and utilities are outcomes of
+        parameter draws (and not of patients simulated with common random numbers)
+    :param backend: (CEABackends) how the confidence intervals of ICER and net monetary benefit are calculated
     """
 
+    # do cost-effectiveness analysis
+    CEA = _get_CEA(sim_outcomes_none=sim_outcomes_none,
+                   sim_outcomes_anticoag=sim_outcomes_anticoag,
+                   if_paired=if_paired)
+
+    # plot cost-effectiveness figure
+    CEA.plot_ce_plane(
+        title='Cost-Effectiveness Analysis',
+        x_label='Additional QALYs',
+        y_label='Additional Cost',
+        x_range=(-0.25, 0.75),
+        y_range=(-2500, 5000),
+        interval_type='c'
+    )
+
+    if backend == D.CEABackends.NUMPY:
+        bootstrap_CEA = _get_bootstrap_CEA(sim_outcomes_none=sim_outcomes_none,
+                                           sim_outcomes_anticoag=sim_outcomes_anticoag,
+                                           if_paired=if_paired,
+                                           if_observations_are_draws=if_observations_are_draws)
+
+        # report the CE table
+        bootstrap_CEA.export_ce_table(file_name='CETable.csv')
+
+        # cost-benefit analysis
+        # show the net monetary benefit figure and the cost-effectiveness acceptability curves
+        _plot_incremental_nmb_lines(wtp_values=bootstrap_CEA.wtpValues,
+                                    incremental_nmbs=bootstrap_CEA.incrementalNMBs,
+                                    intervals=bootstrap_CEA.incrementalNMBIntervals)
+        _plot_acceptability_curves(bootstrap_CEA=bootstrap_CEA)
+        return
+
+    # report the CE table
+    _write_CE_table(CEA=CEA)
+
+    # cost-benefit analysis
+    # show the net monetary benefit figure
+    CEA.plot_incremental_nmb_lines(
+        title='Cost-Benefit Analysis',
+        x_label='Willingness-to-pay per QALY ($)',
+        y_label='Incremental Net Monetary Benefit ($)',
+        interval_type='c',
+        show_legend=True,
+        figure_size=(6, 5)
+    )
+
+
+@profiled()
+def write_CE_table(sim_outcomes_none, sim_outcomes_anticoag, if_paired=False, backend=D.CEA_BACKEND):
+    """ writes the CE table to CETable.csv (the machine-readable part of report_CEA_CBA)
+    :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
+    :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagultation therapy
+    :param if_paired: set to True if the costs and utilities of the two strategies are paired
+    :param backend: (CEABackends) how the confidence interval of ICER is calculated
+    """
+
+    if backend == D.CEABackends.NUMPY:
+        _get_bootstrap_CEA(sim_outcomes_none=sim_outcomes_none,
+                           sim_outcomes_anticoag=sim_outcomes_anticoag,
+                           if_paired=if_paired).export_ce_table(file_name='CETable.csv')
+    else:
+        _write_CE_table(CEA=_get_CEA(sim_outcomes_none=sim_outcomes_none,
+                                     sim_outcomes_anticoag=sim_outcomes_anticoag,
+                                     if_paired=if_paired))
+
+
+@profiled()
+def report_expected_CEA_CBA(expected_outcomes_none, expected_outcomes_anticoag):
+    """ performs cost-effectiveness and cost-benefit analyses of expected outcomes
+    (point estimates, so the CE table and the net monetary benefit figure have no confidence intervals)
+    :param expected_outcomes_none: (DeterministicOutcomes) expected outcomes under no therapy
+    :param expected_outcomes_anticoag: (DeterministicOutcomes) expected outcomes under anticoagulation
+    """
+
+    costs = [outcomes.statCost.get_mean() for outcomes in (expected_outcomes_none, expected_outcomes_anticoag)]
+    utilities = [outcomes.statUtility.get_mean() for outcomes in (expected_outcomes_none, expected_outcomes_anticoag)]
+
+    # report the CE table
+    with open('CETable.csv', 'w', newline='') as file:
+        csv.writer(file).writerows(_get_expected_ce_table(costs=costs, utilities=utilities))
+
+    # cost-benefit analysis
+    # show the net monetary benefit figure
+    wtp_values = np.linspace(D.WTP_RANGE[0], D.WTP_RANGE[1], num=D.N_WTP_VALUES, endpoint=True)
+    _plot_incremental_nmb_lines(wtp_values=wtp_values,
+                                incremental_nmbs=wtp_values * (utilities[1] - utilities[0]) - (costs[1] - costs[0]))
+
+
+@profiled()
+def write_outcomes(sim_outcomes, therapy_name):
+    """ writes the outcomes of a simulated cohort to machine-readable files
+    (the machine-readable part of print_outcomes):
+    the means and confidence intervals to <therapy>_outcomes.json and
+    the outcomes of patients (if they are stored) to <therapy>_patients.csv
+    :param sim_outcomes: outcomes of a simulated cohort
+    :param therapy_name: the name of the selected therapy
+    """
+
+    name = therapy_name.name if isinstance(therapy_name, Enum) else str(therapy_name)
+
+    summary = {}
+    for stat_name, sim_stat in (('survival_time', sim_outcomes.statSurvivalTime),
+                                ('n_strokes', sim_outcomes.statNumStrokes),
+                                ('cost', sim_outcomes.statCost),
+                                ('utility', sim_outcomes.statUtility)):
+        summary[stat_name] = {'mean': float(sim_stat.get_mean()),
+                              'interval': [float(v) for v in sim_stat.get_interval(interval_type='c', alpha=D.ALPHA)]}
+    with open(name + '_outcomes.json', 'w') as file:
+        json.dump(summary, file, indent=2)
+
+    # outcomes of patients (survival time is empty for patients who are alive at the end of simulation)
+    if hasattr(sim_outcomes, 'patientSurvivalTimes'):
+        np.savetxt(name + '_patients.csv',
+                   np.column_stack((sim_outcomes.patientSurvivalTimes, sim_outcomes.nStrokes,
+                                    sim_outcomes.costs, sim_outcomes.utilities)),
+                   delimiter=',', fmt='%.10g', header='survival_time,n_strokes,cost,utility', comments='')
+
+
+def get_sample_path(survival_curve):
+    """ :returns (deampy.sample_path.PrevalenceSamplePath) a survival curve as a sample path
+    that can be plotted with deampy.plots.sample_paths
+    :param survival_curve: (SurvivalCurve) the survival curve
+    """
+
+    from deampy.sample_path import PrevalenceSamplePath
+
+    sample_path = PrevalenceSamplePath(name=survival_curve.name, initial_size=survival_curve.initialSize,
+                                       collect_stat=False)
+    # the sample path reads its times and values from the survival curve
+    # (instead of recording the deaths one at a time)
+    sample_path.get_times = survival_curve.get_times
+    sample_path.get_values = survival_curve.get_values
+    return sample_path
+
+
+def _get_CEA(sim_outcomes_none, sim_outcomes_anticoag, if_paired):
+    """ :returns (econ.CEA) cost-effectiveness analysis of the two therapies """
+
+    import deampy.econ_eval as econ
+
     # define two strategies
     no_therapy_strategy = econ.Strategy(
         name='No Therapy',
@@ -176,43 +400,292 @@ def report_CEA_CBA(sim_outcomes_none, sim_outcomes_anticoag):
         color='blue'
     )
 
-    # do cost-effectiveness analysis
     # (the first strategy in the list of strategies is assumed to be the 'Base' strategy)
-    CEA = econ.CEA(
+    return econ.CEA(
         strategies=[no_therapy_strategy, anticoag_therapy_strategy],
-        if_paired=False
+        if_paired=if_paired,
+        wtp_range=D.WTP_RANGE,
+        n_of_wtp_values=D.N_WTP_VALUES
     )
 
-    # plot cost-effectiveness figure
-    CEA.plot_CE_plane(
-        title='Cost-Effectiveness Analysis',
-        x_label='Additional QALYs',
-        y_label='Additional Cost',
-        x_range=(-0.25, 0.75),
-        y_range=(-2500, 5000),
-        interval_type='c'
-    )
 
-    # report the CE table
-    CEA.build_CE_table(
+def _get_bootstrap_CEA(sim_outcomes_none, sim_outcomes_anticoag, if_paired, if_observations_are_draws=False):
+    """ :returns (BootstrapCEA) cost-effectiveness analysis of the two therapies with its bootstrap samples drawn """
+
+    bootstrap_CEA = CE.BootstrapCEA(sim_outcomes_none=sim_outcomes_none,
+                                    sim_outcomes_anticoag=sim_outcomes_anticoag,
+                                    if_paired=if_paired,
+                                    if_observations_are_draws=if_observations_are_draws)
+    bootstrap_CEA.calculate()
+    return bootstrap_CEA
+
+
+def _get_expected_ce_table(costs, utilities, names=('No Therapy', 'Anticoagulation Therapy')):
+    """ :returns (list) rows of the cost-effectiveness table of expected outcomes
+    (the columns of deampy.econ_eval.CEA.export_ce_table without confidence intervals)
+    :param costs: expected costs of no therapy and anticoagulation
+    :param utilities: expected utilities of no therapy and anticoagulation
+    :param names: names of no therapy and anticoagulation
+    """
+
+    rows = [['Strategy', 'Cost', 'Effect', 'Incremental Cost', 'Incremental Effect', 'ICER']]
+    # (strategies in increasing order of cost)
+    order = (0, 1) if costs[1] >= costs[0] else (1, 0)
+    for i in order:
+        row = [names[i], F.format_number(number=costs[i], deci=0, format=','),
+               F.format_number(number=utilities[i], deci=2)]
+
+        base = order[0]
+        if i == base:
+            row += ['-', '-', '-']
+        elif utilities[i] - utilities[base] <= 0:
+            # the more costly therapy is not more effective
+            row += ['-', '-', 'Dominated']
+        else:
+            inc_cost = costs[i] - costs[base]
+            inc_utility = utilities[i] - utilities[base]
+            row += [F.format_number(number=inc_cost, deci=0, format=','),
+                    F.format_number(number=inc_utility, deci=2),
+                    F.format_number(number=inc_cost / inc_utility, deci=2, format=',')]
+        rows.append(row)
+
+    return rows
+
+
+def _plot_incremental_nmb_lines(wtp_values, incremental_nmbs, intervals=None):
+    """ draws the incremental net monetary benefit of anticoagulation and its confidence interval
+    (the lines drawn by econ.CEA.plot_incremental_nmb_lines)
+    :param wtp_values: willingness-to-pay values
+    :param incremental_nmbs: incremental net monetary benefit of anticoagulation at each willingness-to-pay value
+    :param intervals: (lower, upper) confidence interval at each willingness-to-pay value (None to draw no interval)
+    """
+
+    import matplotlib.pyplot as plt
+    from deampy.plots.plot_support import output_figure
+
+    fig, ax = plt.subplots(figsize=(6, 5))
+    ax.plot(wtp_values, np.zeros_like(wtp_values), color='red', alpha=0.5, label='No Therapy')
+    ax.plot(wtp_values, incremental_nmbs, color='blue', alpha=0.5, label='Anticoagulation Therapy')
+    if intervals is not None:
+        ax.fill_between(wtp_values, *intervals, color='blue', alpha=0.2)
+    ax.set_title('Cost-Benefit Analysis')
+    ax.set_xlabel('Willingness-to-pay per QALY ($)')
+    ax.set_ylabel('Incremental Net Monetary Benefit ($)')
+    ax.set_xlim(wtp_values[0], wtp_values[-1])
+    ax.legend(loc='best')
+
+    output_figure(plt=plt)
+
+
+def _plot_acceptability_curves(bootstrap_CEA):
+    """ draws the probability that each therapy has the highest net monetary benefit """
+
+    import matplotlib.pyplot as plt
+    from deampy.plots.plot_support import output_figure
+
+    fig, ax = plt.subplots(figsize=(6, 5))
+    for curve, label, color in zip(bootstrap_CEA.acceptabilityCurves,
+                                   ('No Therapy', 'Anticoagulation Therapy'), ('red', 'blue')):
+        ax.plot(bootstrap_CEA.wtpValues, curve, color=color, label=label)
+    ax.set_title('Cost-Effectiveness Acceptability Curves')
+    ax.set_xlabel('Willingness-to-pay per QALY ($)')
+    ax.set_ylabel('Probability of being the optimal strategy')
+    ax.set_xlim(bootstrap_CEA.wtpValues[0], bootstrap_CEA.wtpValues[-1])
+    ax.set_ylim(-0.01, 1.01)
+    ax.legend(loc='best')
+
+    output_figure(plt=plt)
+
+
+def _write_CE_table(CEA):
+
+    CEA.export_ce_table(
         interval_type='c',
         alpha=D.ALPHA,
         cost_digits=0,
         effect_digits=2,
-        icer_digits=2)
+        icer_digits=2,
+        file_name='CETable.csv')
 
-    # cost-benefit analysis
-    CBA = econ.CBA(
-        strategies=[no_therapy_strategy, anticoag_therapy_strategy],
-        wtp_range=[0, 100000],
-        if_paired=False
-    )
-    # show the net monetary benefit figure
-    CBA.plot_marginal_nmb_lines(
-        title='Cost-Benefit Analysis',
-        x_label='Willingness-to-pay per QALY ($)',
-        y_label='Marginal Net Monetary Benefit ($)',
-        interval_type='c',
-        show_legend=True,
-        figure_size=(6, 5)
-    )
+
+@profiled()
+def print_scenario_outcomes(scenario_runner):
+    """ prints the mean discounted cost and utility of both therapies and the incremental
+    cost-effectiveness ratio of anticoagulation under each scenario
+    :param scenario_runner: (ScenarioRunner) a scenario runner that is simulated
+    """
+
+    scenarios = scenario_runner.scenarios
+
+    # inputs that vary across scenarios
+    names = [name for name in scenarios[0] if any(s[name] != scenarios[0][name] for s in scenarios)]
+
+    print('Outcomes of {} scenarios ({} cohorts simulated, {} cohorts read from the cache):'
+          .format(len(scenarios), scenario_runner.nSimulatedCohorts, scenario_runner.nCachedCohorts))
+    for scenario, outcomes in zip(scenarios, scenario_runner.outcomes):
+        none = outcomes[P.Therapies.NONE]
+        anticoag = outcomes[P.Therapies.ANTICOAG]
+
+        # incremental cost and utility of anticoagulation with respect to no therapy
+        incremental_cost = anticoag.statCost.get_mean() - none.statCost.get_mean()
+        incremental_utility = anticoag.statUtility.get_mean() - none.statUtility.get_mean()
+        if incremental_utility > 0:
+            icer_text = F.format_number(number=incremental_cost / incremental_utility, deci=0, format=',')
+        elif incremental_cost <= 0:
+            icer_text = 'Dominant' if incremental_utility >= 0 else 'N/A'
+        else:
+            icer_text = 'Dominated'
+
+        print(', '.join('{}={}'.format(name, scenario[name]) for name in names))
+        print('  Discounted cost (none, anticoagulation):',
+              F.format_number(number=none.statCost.get_mean(), deci=0, format=','),
+              F.format_number(number=anticoag.statCost.get_mean(), deci=0, format=','))
+        print('  Discounted utility (none, anticoagulation):',
+              F.format_number(number=none.statUtility.get_mean(), deci=2),
+              F.format_number(number=anticoag.statUtility.get_mean(), deci=2))
+        print('  Incremental cost, utility and ICER:',
+              F.format_number(number=incremental_cost, deci=0, format=','),
+              F.format_number(number=incremental_utility, deci=2),
+              icer_text)
+
+
+@profiled()
+def print_variance_reduction(sim_outcomes_none, sim_outcomes_anticoag, if_paired=False, if_antithetic=False):
+    """ prints how much the variance of the estimated increase in discounted cost, discounted utility and
+    number of strokes is reduced by common random numbers and antithetic patients
+    :param sim_outcomes_none: outcomes of a cohort simulated under no therapy
+    :param sim_outcomes_anticoag: outcomes of a cohort simulated under anticoagulation
+    :param if_paired: set to True if the two cohorts are simulated with common random numbers
+    :param if_antithetic: set to True if patients are simulated in antithetic pairs
+    """
+
+    for name, x, y_ref in (
+            ('discounted cost', sim_outcomes_anticoag.costs, sim_outcomes_none.costs),
+            ('discounted utility', sim_outcomes_anticoag.utilities, sim_outcomes_none.utilities),
+            ('number of strokes', sim_outcomes_anticoag.nStrokes, sim_outcomes_none.nStrokes)):
+
+        factor = get_variance_reduction_factor(x=x, y_ref=y_ref, if_paired=if_paired, if_antithetic=if_antithetic)
+        print("Variance reduction factor for the increase in mean {}: {:.2f} "
+              "(the same confidence interval width needs {:.0%} of the patients)".format(name, factor, 1 / factor))
+
+
+def get_variance_reduction_factor(x, y_ref=None, if_paired=False, if_antithetic=False):
+    """ estimates the ratio of the variance of an estimator without variance reduction to its variance
+    with variance reduction (the factor by which the number of patients can be reduced to get
+    confidence intervals of the same width)
+    :param x: observations of patients
+    :param y_ref: observations of patients under the reference strategy
+        (if provided, the estimator is the difference of the means of x and y_ref)
+    :param if_paired: set to True if the observations x and y_ref are paired (common random numbers)
+    :param if_antithetic: set to True if observations 2i and 2i+1 are of antithetic patients
+    :returns the variance reduction factor
+    """
+
+    def get_variance(observations):
+        # variance per patient of the mean of observations
+        observations = np.asarray(observations, dtype=float)
+        if if_antithetic:
+            # the mean of n observations is the mean of n/2 independent pair means
+            n_pairs = len(observations) // 2
+            pair_means = observations[:2 * n_pairs].reshape(n_pairs, 2).mean(axis=1)
+            return 2 * np.var(pair_means, ddof=1)
+        return np.var(observations, ddof=1)
+
+    x = np.asarray(x, dtype=float)
+    if y_ref is None:
+        return np.var(x, ddof=1) / get_variance(x)
+
+    y_ref = np.asarray(y_ref, dtype=float)
+    # variance of the difference of means of two independent cohorts without variance reduction
+    variance = np.var(x, ddof=1) + np.var(y_ref, ddof=1)
+    if if_paired:
+        return variance / get_variance(x - y_ref)
+    return variance / (get_variance(x) + get_variance(y_ref))
+
+
+@profiled()
+def plot_tornado(one_way_sensitivity):
+    """ draws the tornado diagram of a one-way sensitivity analysis
+    (the incremental net monetary benefit of anticoagulation at the low and high value of each input)
+    :param one_way_sensitivity: (OneWaySensitivity) a one-way sensitivity analysis that is simulated
+    """
+
+    import matplotlib.pyplot as plt
+    from deampy.plots.plot_support import output_figure
+
+    # inputs with the largest swing are drawn at the top
+    rows = one_way_sensitivity.get_tornado_rows()[::-1]
+    base = one_way_sensitivity.baseNMB
+    positions = np.arange(len(rows))
+
+    fig, ax = plt.subplots(figsize=(6, 1 + 0.5 * len(rows)))
+    ax.barh(positions, [row[3] - base for row in rows], left=base, color='red', label='Low value')
+    ax.barh(positions, [row[4] - base for row in rows], left=base, color='blue', label='High value')
+    ax.axvline(x=base, color='black', linewidth=1)
+    ax.set_yticks(positions)
+    ax.set_yticklabels(['{} ({:.4g}, {:.4g})'.format(row[0], row[1], row[2]) for row in rows])
+    ax.set_title('One-way sensitivity analysis')
+    ax.set_xlabel('Incremental Net Monetary Benefit ($)')
+    ax.legend(loc='best')
+
+    output_figure(plt=plt)
+
+
+@profiled()
+def print_tornado_table(one_way_sensitivity):
+    """ prints the incremental net monetary benefit of anticoagulation at the low and high value of each input
+    (sorted by the swing of the net monetary benefit)
+    :param one_way_sensitivity: (OneWaySensitivity) a one-way sensitivity analysis that is simulated
+    """
+
+    print('Incremental net monetary benefit at the base values of inputs:',
+          F.format_number(number=one_way_sensitivity.baseNMB, deci=0, format=','))
+    for name, low, high, nmb_low, nmb_high in one_way_sensitivity.get_tornado_rows():
+        print('  {} from {:.4g} to {:.4g}: {} to {}'.format(
+            name, low, high,
+            F.format_number(number=nmb_low, deci=0, format=','),
+            F.format_number(number=nmb_high, deci=0, format=',')))
+
+
+@profiled()
+def write_tornado_table(one_way_sensitivity):
+    """ writes the rows of the tornado diagram to Tornado.csv (the machine-readable part of print_tornado_table)
+    :param one_way_sensitivity: (OneWaySensitivity) a one-way sensitivity analysis that is simulated
+    """
+
+    with open('Tornado.csv', 'w') as file:
+        file.write('input,low,high,nmb_low,nmb_high,nmb_base\n')
+        for row in one_way_sensitivity.get_tornado_rows():
+            file.write('{},{:.10g},{:.10g},{:.10g},{:.10g},{:.10g}\n'.format(*row, one_way_sensitivity.baseNMB))
+
+
+@profiled()
+def print_two_way_table(two_way_sensitivity):
+    """ prints the incremental net monetary benefit of anticoagulation at each grid point
+    of a two-way sensitivity analysis
+    :param two_way_sensitivity: (TwoWaySensitivity) a two-way sensitivity analysis that is simulated
+    """
+
+    print('Incremental net monetary benefit ({} in rows, {} in columns):'
+          .format(two_way_sensitivity.nameX, two_way_sensitivity.nameY))
+    print('{:>12s}'.format('') + ''.join('{:>12.4g}'.format(y) for y in two_way_sensitivity.valuesY))
+    for x, nmbs in zip(two_way_sensitivity.valuesX, two_way_sensitivity.incrementalNMBs):
+        print('{:>12.4g}'.format(x) + ''.join('{:>12s}'.format(F.format_number(number=nmb, deci=0, format=','))
+                                              for nmb in nmbs))
+
+
+@profiled()
+def write_two_way_table(two_way_sensitivity):
+    """ writes the incremental net monetary benefit of each grid point to TwoWay.csv
+    (the machine-readable part of print_two_way_table)
+    :param two_way_sensitivity: (TwoWaySensitivity) a two-way sensitivity analysis that is simulated
+    """
+
+    with open('TwoWay.csv', 'w') as file:
+        file.write('{},{},incremental_cost,incremental_utility,incremental_nmb\n'
+                   .format(two_way_sensitivity.nameX, two_way_sensitivity.nameY))
+        for i, x in enumerate(two_way_sensitivity.valuesX):
+            for j, y in enumerate(two_way_sensitivity.valuesY):
+                file.write('{:.10g},{:.10g},{:.10g},{:.10g},{:.10g}\n'.format(
+                    x, y, two_way_sensitivity.incrementalCosts[i, j],
+                    two_way_sensitivity.incrementalUtilities[i, j], two_way_sensitivity.incrementalNMBs[i, j]))